@@ -1,20 +1,35 @@
 """Data loading utilities for question-specific inputs."""
-import json
-import csv
-import pandas as pd
-from pathlib import Path
-from utils import load_dataset
+import os
+from functools import lru_cache
 from pathlib import Path
-from dataclasses import dataclass
-from logging import Logger
+
 import pandas as pd
-import xarray as xr
-import numpy as np
-#import yaml
+
+from utils import load_file, load_json
+
+
+@lru_cache(maxsize=None)
+def _load_file_cached(path_str: str, mtime_ns: int):
+    """Parse a non-JSON data file; cached per (path, modification time)."""
+    return load_file(path_str)
+
+
+def _load_one(path_str: str):
+    """Parse a single data file; repeated loads of an unchanged file are served from cache.
+
+    JSON goes straight to load_json, which keeps its own modification-time keyed cache.
+    """
+    if Path(path_str).suffix.lower() == '.json':
+        return load_json(path_str)
+    return _load_file_cached(path_str, os.stat(path_str).st_mtime_ns)
 
 
 class DataLoader:
-    """Load all JSON/CSV files for a given question under data/<question>."""
+    """Load all JSON/CSV files for a given question under data/<question>.
+
+    Files are indexed at construction and parsed lazily on first attribute
+    access (e.g. ``dataloader.bus_params``).
+    """
     question: str
     input_path: Path
 
@@ -26,19 +41,42 @@ class DataLoader:
             self._load_dataset(question)
 
     def _load_dataset(self, question_name: str):
-        """Load all files using utils.load_dataset and attach them as attributes."""
-        # Load the data
-        data = load_dataset(question_name)
-        # 
-        if data:
-            for key, value in data.items():
-                setattr(self, key, value)
-            print(f"Loaded {len(data)} files from {self.input_path}")
+        """Index all files under data/<question_name> by stem; contents are loaded on demand."""
+        base_path = Path("data") / question_name
+        self._file_index = {p.stem: p for p in base_path.glob("*") if p.is_file()}
+        if self._file_index:
+            print(f"Indexed {len(self._file_index)} files from {self.input_path}")
         else:
             print(f"No data loaded from {self.input_path}")
 
+    def __getattr__(self, name: str):
+        """Load an indexed dataset on first access and cache it as an attribute."""
+        path = self.__dict__.get('_file_index', {}).get(name)
+        if path is None:
+            raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+        try:
+            value = _load_one(str(path))
+        except Exception as e:
+            print(f"Error loading {path}: {e}")
+            raise AttributeError(name) from e
+        setattr(self, name, value)
+        return value
+
 
 
+    def iter_chunks(self, name: str, chunksize: int = 100_000):
+        """Iterate over a CSV dataset in DataFrame chunks of `chunksize` rows.
+
+        Use instead of attribute access for large CSV inputs that only need
+        streaming reductions; peak memory is bounded by the chunk size.
+        """
+        path = self.__dict__.get('_file_index', {}).get(name)
+        if path is None:
+            raise KeyError(f"No dataset named '{name}' under data/{self.question}")
+        if path.suffix.lower() != '.csv':
+            raise ValueError(f"Chunked reading is only supported for CSV files, got {path.name}")
+        return pd.read_csv(path, chunksize=chunksize, engine='c')
+
     def _load_data_file(self, question_name: str, file_name: str):
         """
         Placeholder for loading a specific file if needed in the future.
@@ -1,7 +1,122 @@
 """Visualization utilities for scenarios, tariffs/prices, and duals."""
 
-import matplotlib.pyplot as plt
+import contextlib
+import itertools
 import os
+import re
+import sys
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, wait as futures_wait
+from utils.utils import get_unique_filename, load_json
+
+
+# matplotlib is imported on the first plot call (see _load_matplotlib), not with this module
+plt = None
+# Default color cycle, read from rcParams once when matplotlib is loaded
+_DEFAULT_COLORS = ()
+
+# Per-series line styles and markers, cycled by series position
+_LINE_STYLES = ('-', '--', '-.', ':')
+_MARKERS = ('o', 's', 'D', '^', 'v', '>', '<', 'p', '*', 'h', 'x')
+_DUAL_MARKERS = ('o', 's', 'D', '^', 'v', 'x')
+
+
+def _load_matplotlib():
+    """Import matplotlib into this module's globals on first use and return pyplot.
+
+    Runs that only collect results (no show/save) never pay matplotlib's start-up cost.
+    """
+    global plt, FigureCanvasAgg, LineCollection, Figure, Line2D, _DEFAULT_COLORS
+    if plt is None:
+        import matplotlib
+        # Headless runs (no display available) only ever save figures: use the non-interactive Agg backend
+        if (sys.platform.startswith('linux') and 'MPLBACKEND' not in os.environ
+                and not os.environ.get('DISPLAY') and not os.environ.get('WAYLAND_DISPLAY')):
+            matplotlib.use('Agg')
+        import matplotlib.pyplot as pyplot
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.collections import LineCollection
+        from matplotlib.figure import Figure
+        from matplotlib.lines import Line2D
+        _DEFAULT_COLORS = tuple(pyplot.rcParams['axes.prop_cycle'].by_key()['color'])
+        plt = pyplot
+    return plt
+
+
+def _to_float(val):
+    """Return val as float, unwrapping Gurobi Vars via .X (NaN if not numeric)."""
+    # Plain numbers (the common case) skip the attribute lookup and the try block
+    t = type(val)
+    if t is float or t is int:
+        return float(val)
+    x = getattr(val, 'X', None)  # Gurobi Var
+    if x is not None:
+        return float(x)
+    try:
+        return float(val)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _new_figure(figsize, interactive=False):
+    """Return (fig, ax); only figures that will be shown go through pyplot's global figure registry."""
+    _load_matplotlib()
+    if interactive:
+        return plt.subplots(figsize=figsize)
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig, fig.add_subplot(111)
+
+
+# Threads used to write PNGs in plot_comparison (encoding and file I/O release the GIL)
+_SAVE_WORKERS = 4
+# zlib level 3 encodes PNGs several times faster than Pillow's default (6) for slightly larger files
+_PNG_PIL_KWARGS = {'compress_level': 3}
+
+
+# Series longer than this are drawn with aggressive path simplification (path.simplify is
+# already on by default; only the threshold, in pixels, is raised from 1/9)
+_LONG_SERIES_POINTS = 10_000
+_LONG_SERIES_RC = {'path.simplify_threshold': 1.0}
+
+
+def _decimate_minmax(y, n_bins):
+    """Reduce a long series to its per-bin min and max samples, kept in time order.
+
+    Returns (x, y) with 2 * ceil(len(y) / bin_size) points, where x are the original
+    sample indices. Drawing these gives the same image as the full series once a
+    bin is narrower than a pixel.
+    """
+    n = y.size
+    bin_size = -(-n // n_bins)
+    n_full = -(-n // bin_size) * bin_size
+    blocks = np.concatenate([y, np.full(n_full - n, np.nan, dtype=y.dtype)]).reshape(-1, bin_size)
+    nan = np.isnan(blocks)
+    i_min = np.where(nan, np.inf, blocks).argmin(axis=1)
+    i_max = np.where(nan, -np.inf, blocks).argmax(axis=1)
+    offsets = np.arange(blocks.shape[0]) * bin_size
+    idx = np.stack([offsets + np.minimum(i_min, i_max), offsets + np.maximum(i_min, i_max)], axis=1).ravel()
+    idx = np.minimum(idx, n - 1)
+    return idx, y[idx]
+
+
+# Time-indexed dual constraint names: <base>_<t> or "<base> <t>"
+_DUAL_RX = re.compile(r'^(?P<base>.*?)[_\s](?P<idx>\d+)$')
+# First number in a scenario label (e.g. 'price_0.1'), used as battery price coefficient fallback
+_FLOAT_RX = re.compile(r"([\d.]+)")
+# Characters not wanted in filenames: spaces become '_', path separators '-'
+_SANITIZE_RX = re.compile(r"[ /\\]")
+_SANITIZE_MAP = {' ': '_', '/': '-', '\\': '-'}
+
+
+def _sanitize_name(name):
+    """Make a scenario name safe to use in a filename in a single regex pass."""
+    return _SANITIZE_RX.sub(lambda m: _SANITIZE_MAP[m.group(0)], name)
+
+# Elementwise _to_float over object arrays (one pass for all values)
+_unwrap = np.frompyfunc(_to_float, 1, 1)
+
 
 class DataVisualizer:
     """Aggregate scenario results and provide plotting utilities."""
@@ -22,8 +137,7 @@ class DataVisualizer:
             price_coeff = scenario['results'].get(price_coeff_key)
             if price_coeff is None:
                 # Try to parse from label or scenario name (assume format like 'price_0.1')
-                import re
-                match = re.search(r"([\d.]+)", scenario['label'])
+                match = _FLOAT_RX.search(scenario['label'])
                 if match:
                     price_coeff = float(match.group(1))
                 else:
@@ -37,53 +151,54 @@ class DataVisualizer:
             print(f"No data found for keys '{price_coeff_key}' and '{cap_key}'.")
             return
         # Convert all x and y values to floats (handle Gurobi Var objects)
-        def to_float(val):
-            if hasattr(val, 'X'):
-                return float(val.X)
-            try:
-                return float(val)
-            except Exception:
-                return None
-        x_vals_f = [to_float(x) for x in x_vals]
-        y_vals_f = [to_float(y) for y in y_vals]
+        x = _unwrap(np.array(x_vals, dtype=object)).astype(float)
+        y = _unwrap(np.array(y_vals, dtype=object)).astype(float)
         # Remove any pairs where conversion failed
-        filtered = [(x, y, label) for x, y, label in zip(x_vals_f, y_vals_f, labels) if x is not None and y is not None]
-        if not filtered:
+        mask = np.isfinite(x) & np.isfinite(y)
+        if not mask.any():
             print("No valid numeric data to plot.")
             return
-        x_vals_f, y_vals_f, labels = zip(*filtered)
+        x, y, labels = x[mask], y[mask], np.array(labels, dtype=object)[mask]
         # Sort by x for nice plotting
-        xy = sorted(zip(x_vals_f, y_vals_f, labels), key=lambda tup: tup[0])
-        x_vals_f, y_vals_f, labels = zip(*xy)
-        import matplotlib.pyplot as plt
-        plt.figure(figsize=(8, 5))
-        plt.plot(x_vals_f, y_vals_f, marker="o", linestyle="-", color="tab:blue")
-        plt.xlabel("Battery Price Coefficient")
-        plt.ylabel("Optimal Battery Capacity (kWh)")
+        order = np.argsort(x, kind='stable')
+        x_vals_f, y_vals_f, labels = x[order], y[order], labels[order]
+        fig, ax = _new_figure((8, 5), interactive=show_plot)
+        ax.plot(x_vals_f, y_vals_f, marker="o", linestyle="-", color="tab:blue")
+        ax.set_xlabel("Battery Price Coefficient")
+        ax.set_ylabel("Optimal Battery Capacity (kWh)")
         title = "Battery Capacity vs. Battery Price Coefficient"
         if fixed_da and isinstance(fixed_da,(int,float)):
             title += f" (fixed DA={fixed_da})"
         if vary_tariff:
             title += " (varying tariff)"
-        plt.title(title)
-        plt.grid(True, linestyle="--", alpha=0.5)
-        plt.tight_layout()
+        ax.set_title(title)
+        ax.grid(True, linestyle="--", alpha=0.5)
+        fig.tight_layout()
         if save_plot:
             img_dir = os.path.join("img", self.question if self.question else "")
-            os.makedirs(img_dir, exist_ok=True)
+            self._ensure_dir(img_dir)
             filename = os.path.join(img_dir, "battery_capacity_vs_price.png")
             if fixed_da and isinstance(fixed_da,(int,float)):
                 filename = filename.replace(".png", f"_fixedDA{fixed_da}.png")
             if vary_tariff:
                 filename = filename.replace(".png", f"_varyTariff.png")
-            plt.savefig(filename)
+            fig.savefig(filename, pil_kwargs=_PNG_PIL_KWARGS)
             print(f"Plot saved: {filename}")
         if show_plot:
             plt.show()
+            plt.close(fig)
     def __init__(self, question=None):
         """Initialize the visualizer with an optional question identifier."""
         self.scenarios = {}
         self.question = question
+        self._last_figures = []
+        self._dirs_made = set() # output directories already created by this visualizer
+
+    def _ensure_dir(self, d):
+        """Create directory d (and parents) once per visualizer; later calls skip the syscalls."""
+        if d not in self._dirs_made:
+            os.makedirs(d, exist_ok=True)
+            self._dirs_made.add(d)
 
     def add_scenario(self, name, results, label=None):
         """
@@ -93,13 +208,22 @@ class DataVisualizer:
         label: optional label for legend
         """
         # Always sanitize the scenario name for internal use
-        import os
         key = os.path.basename(name)
         key = os.path.splitext(key)[0]
         key = key.replace(" ", "_")
+        # Convert list-valued results to float32 arrays once (None -> NaN, Gurobi Var -> .X)
+        arrays = {}
+        all_nan = {}
+        for k, v in results.items():
+            if isinstance(v, list):
+                arr = np.array([np.nan if x is None else float(getattr(x, 'X', x)) for x in v], dtype=np.float32)
+                arrays[k] = arr
+                all_nan[k] = bool(np.isnan(arr).all())
         self.scenarios[key] = {
             'results': results,
-            'label': label if label else key
+            'label': label if label else key,
+            'arrays': arrays,
+            'all_nan': all_nan
         }
 
     # def plot_scenario(self, name, keys=None):
@@ -119,159 +243,232 @@ class DataVisualizer:
     #     plt.title(f"Scenario: {self.scenarios[name]['label']}")
     #     plt.xlabel("Hour")
     #     plt.ylabel("Energy (kWh)")
-    #     plt.legend()
+    #     plt.legend(loc='upper right')
     #     plt.grid(True)
     #     plt.show()
 
-    def plot_comparison(self, keys=None, show_plots=False, save_plots=False, fixed_da=None, vary_tariff=False):
+    def plot_comparison(self, keys=None, show_plots=False, save_plots=False, fixed_da=None, vary_tariff=False, show_markers=False, return_figures=False, legend_loc='upper right'):
         """
         For each key, plot all scenarios together in one file (cross-scenario comparison for each physical quantity).
         keys: list of result keys to plot (e.g., ['p_import', 'p_export'])
+        show_markers: if True, draw one marked line per scenario (slow path); otherwise all
+            scenarios are drawn as a single LineCollection without markers.
+        return_figures: if True, keep the figures open, store them on self._last_figures and return them.
+        legend_loc: fixed legend position; 'best' searches all positions for overlap and is slow on long series.
         """
+        if not (show_plots or save_plots or return_figures):
+            # Nothing would be shown, saved or returned: skip drawing entirely
+            return
+        _load_matplotlib()
         if not self.scenarios:
             print("No scenarios to compare.")
             return
+        # Tariffs, prices and series lengths are taken from the first scenario
+        first_scenario = next(iter(self.scenarios.values()))
+        first_results = first_scenario['results']
+        first_arrays = first_scenario['arrays']
         if keys is None:
             # Use keys from the first scenario
-            first = next(iter(self.scenarios.values()))['results']
-            keys = [k for k in first.keys() if isinstance(first[k], list)]
-        import itertools
-        line_styles = ['-', '--', '-.', ':']
-        markers = ['o', 's', 'D', '^', 'v', '>', '<', 'p', '*', 'h', 'x']
-        color_cycle = plt.rcParams['axes.prop_cycle'].by_key()['color']
+            keys = [k for k in first_results.keys() if isinstance(first_results[k], list)]
+        # Per-scenario styles are the same for every key; index them by scenario position
+        n = len(self.scenarios)
+        styles = list(itertools.islice(itertools.cycle(_LINE_STYLES), n))
+        markers_ = list(itertools.islice(itertools.cycle(_MARKERS), n))
+        colors = list(itertools.islice(itertools.cycle(_DEFAULT_COLORS), n))
+        if save_plots:
+            # Output directory and scenario part of the filename are the same for every key
+            img_dir = os.path.join("img", self.question if self.question else "")
+            self._ensure_dir(img_dir)
+            scenario_names = "_".join([scenario['label'] for scenario in self.scenarios.values() if scenario.get('label')])
+            if not scenario_names:
+                scenario_names = "all_scenarios"
+            # Sanitize scenario_names for filesystem
+            scenario_names = _sanitize_name(scenario_names)
         # Check if reference_profile exists and is not all None in any scenario
         ref_profile_to_plot = None
         for scenario in self.scenarios.values():
-            ref_profile = scenario['results'].get('reference_profile', None)
-            if isinstance(ref_profile, list) and any(v is not None for v in ref_profile):
-                ref_profile_to_plot = ref_profile
+            if not scenario['all_nan'].get('reference_profile', True):
+                ref_profile_to_plot = scenario['arrays']['reference_profile']
                 break
-        for k in keys:
-            # Check if all values for this key are None in all scenarios
-            all_none = True
-            for scenario in self.scenarios.values():
-                values = scenario['results'].get(k, None)
-                if isinstance(values, list) and any(v is not None for v in values):
-                    all_none = False
-                    break
-            if all_none:
-                print(f"Skipping key '{k}' in plot_comparison: all values are None.")
-                continue
-            plt.figure(figsize=(10, 6))
-            style_cycle = itertools.cycle(line_styles)
-            marker_cycle = itertools.cycle(markers)
-            color_cycle_iter = itertools.cycle(color_cycle)
-
-            # If present and varying, plot phi_imp/phi_exp as background bars and da_price as a line on a twin y-axis
-            # Determine length from the first scenario's series for this key
-            first_results = next(iter(self.scenarios.values()))['results']
-            series_example = first_results.get(k)
-            n_points = len(series_example) if isinstance(series_example, list) else None
-            ax = plt.gca()
-            ax.set_ylabel("Power [kWh]")
-            ax2 = None
-            if n_points is not None:
-                phi_imp = first_results.get('phi_imp')
-                phi_exp = first_results.get('phi_exp')
-                da_price = first_results.get('da_price') or first_results.get('energy_price') or first_results.get('price')
-                # Build secondary axis and always plot DA price if available
-                ax2 = ax.twinx()
-                ax2.set_ylabel("Tariff / Price [DKK/kWh]")
-                if isinstance(da_price, list) and len(da_price) > 0:
-                    x_idx_price = list(range(len(da_price)))
-                    #ax2.plot(x_idx_price, da_price, color='tab:purple', linestyle='--', linewidth=2, label='DA price (right axis)', zorder=2)
-                    ax2.bar(x_idx_price, da_price, color='tab:purple', width=0.25, alpha = 0.4,label='DA price (right axis)', zorder=1)
-                # Tariffs as bars when available and non-constant
-                def non_constant_list(lst):
-                    return isinstance(lst, list) and len(lst) > 0 and any(v != lst[0] for v in lst[1:])
-                plot_imp = non_constant_list(phi_imp)
-                plot_exp = non_constant_list(phi_exp)
-                if plot_imp or plot_exp:
-                    # Choose bar index length based on available series
-                    bar_len = len(phi_imp) if plot_imp else len(phi_exp)
-                    x_idx_bars = list(range(bar_len))
-                    width = 0.25
-                    if plot_imp:
-                        ax2.bar([i - 2 *width for i in x_idx_bars], phi_imp, width=width, alpha=0.2, color='tab:red', label='phi_imp (right axis)', zorder=1)
-                    if plot_exp:
-                        ax2.bar([i - width for i in x_idx_bars], phi_exp, width=width, alpha=0.2, color='tab:green', label='phi_exp (right axis)', zorder=1)
+        # Background tariff/price bars only depend on the first scenario: build their x positions once
+        phi_imp = first_arrays.get('phi_imp')
+        phi_exp = first_arrays.get('phi_exp')
+        da_price = next((first_arrays[p] for p in ('da_price', 'energy_price', 'price') if first_arrays.get(p) is not None and first_arrays[p].size > 0), None)
+        x_idx_price = np.arange(da_price.size) if da_price is not None else None
+        def non_constant_list(arr):
+            # NaN-aware: missing hours neither hide nor fake variation
+            return arr is not None and not np.isnan(arr).all() and np.nanmax(arr) != np.nanmin(arr)
+        plot_imp = non_constant_list(phi_imp)
+        plot_exp = non_constant_list(phi_exp)
+        width = 0.25
+        if plot_imp or plot_exp:
+            # Choose bar index length based on available series
+            bar_len = phi_imp.size if plot_imp else phi_exp.size
+            x_idx_bars = np.arange(bar_len)
+            imp_x = x_idx_bars - 2 * width
+            exp_x = x_idx_bars - width
+        figures = []        # every figure drawn, closed once saved/shown
+        saves = []          # (future, filename) for every figure handed to the save threads
+        # Save-only runs recycle one figure per save thread: a cleared figure keeps its canvas and Agg buffer
+        recycle = save_plots and not (show_plots or return_figures)
+        slots = []          # [figure, future of its latest save] while recycling
+        n_drawn = 0
+        # Figures are saved on the threads while later keys are drawn; the pool is shut down
+        # (pending saves finished) even if drawing a key fails
+        with ThreadPoolExecutor(max_workers=_SAVE_WORKERS) if save_plots else contextlib.nullcontext() as executor:
+            for k in keys:
+                # Check if all values for this key are None in all scenarios
+                all_none = all(scenario['all_nan'].get(k, True) for scenario in self.scenarios.values())
+                if all_none:
+                    print(f"Skipping key '{k}' in plot_comparison: all values are None.")
+                    continue
+                # Determine length from the first scenario's series for this key
+                series_example = first_arrays.get(k)
+                n_points = series_example.size if series_example is not None else None
+                # Very long series are drawn with a larger path simplification threshold. rcParams are global
+                # and Matplotlib rebuilds line paths while drawing, so such a figure is drawn and saved inside
+                # the rc_context, after the background saves still running have finished
+                long_series = n_points is not None and n_points > _LONG_SERIES_POINTS
+                if long_series:
+                    futures_wait([future for future, _ in saves])
+                with plt.rc_context(_LONG_SERIES_RC) if long_series else contextlib.nullcontext():
+                    if recycle:
+                        slot = n_drawn % _SAVE_WORKERS
+                        if slot < len(slots):
+                            fig, last_save = slots[slot]
+                            if last_save is not None:
+                                last_save.result()  # wait until the previous key drawn on this figure is written
+                            fig.clf()
+                            ax = fig.add_subplot(111)
+                        else:
+                            fig, ax = _new_figure((10, 6))
+                            slots.append([fig, None])
+                            figures.append(fig)
+                    else:
+                        fig, ax = _new_figure((10, 6), interactive=show_plots)
+                        figures.append(fig)
+                    n_drawn += 1
+
+                    # If present and varying, plot phi_imp/phi_exp as background bars and da_price as a line on a twin y-axis
+                    ax.set_ylabel("Power [kWh]")
+                    ax2 = None
+                    if n_points is not None:
+                        # Build secondary axis and always plot DA price if available
+                        ax2 = ax.twinx()
+                        ax2.set_ylabel("Tariff / Price [DKK/kWh]")
+                        if da_price is not None:
+                            #ax2.plot(x_idx_price, da_price, color='tab:purple', linestyle='--', linewidth=2, label='DA price (right axis)', zorder=2)
+                            ax2.bar(x_idx_price, da_price, color='tab:purple', width=0.25, alpha = 0.4,label='DA price (right axis)', zorder=1)
+                        # Tariffs as bars when available and non-constant
+                        if plot_imp or plot_exp:
+                            if plot_imp:
+                                ax2.bar(imp_x, phi_imp, width=width, alpha=0.2, color='tab:red', label='phi_imp (right axis)', zorder=1)
+                            if plot_exp:
+                                ax2.bar(exp_x, phi_exp, width=width, alpha=0.2, color='tab:green', label='phi_exp (right axis)', zorder=1)
                     
-            for scenario_idx, (scenario_name, scenario) in enumerate(self.scenarios.items()):
-                style = next(style_cycle)
-                marker = next(marker_cycle)
-                color = next(color_cycle_iter)
-                ax.plot(
-                    scenario['results'][k],
-                    label=scenario['label'],
-                    linestyle=style,
-                    marker=marker,
-                    color=color,
-                    markersize=5,
-                    linewidth=2
-                )
-            # Plot reference_profile if available and not all None, and if key is not 'soc'
-            if ref_profile_to_plot is not None and k != 'soc_normal':
-                ax.plot(ref_profile_to_plot, label='reference_profile', linestyle='--', color='black', linewidth=2)
-            ax.set_title(f"Comparison: {k}")
-            ax.set_xlabel("Hour")
-            #plt.ylabel("Power [kWh]")
-            # Combined legend if tariffs were plotted
-            if 'ax2' in locals() and ax2 is not None:
-                h1, l1 = ax.get_legend_handles_labels()
-                h2, l2 = ax2.get_legend_handles_labels()
-                ax.legend(h1 + h2, l1 + l2, loc='best')
-            else:
-                    ax.legend(title='Left y-axis: Power [kWh]')
-            ax.grid(True)
-            plt.tight_layout()
-            if save_plots:
-                from utils.utils import get_unique_filename
-                img_dir = os.path.join("img", self.question if self.question else "")
-                if not os.path.exists(img_dir):
-                    os.makedirs(img_dir)
-                scenario_names = "_".join([scenario['label'] for scenario in self.scenarios.values() if scenario.get('label')])
-                if not scenario_names:
-                    scenario_names = "all_scenarios"
-                # Sanitize scenario_names for filesystem
-                scenario_names = scenario_names.replace(" ", "_").replace("/", "-").replace("\\", "-")
-                filename = get_unique_filename(os.path.join(img_dir, f"{k}_comparison_{scenario_names}.png"))
-                if filename:
-                    # if fixed_da add suffix
-                    if fixed_da and isinstance(fixed_da,(int,float)):
-                        filename = filename.replace(".png", f"_fixedDA{fixed_da}.png")
-                    if vary_tariff:
-                        filename = filename.replace(".png", f"_varyTariff.png")
+                    # Series much longer than the figure is wide are reduced to per-pixel min/max pairs;
+                    # shown figures keep every point so zooming in stays exact
+                    width_px = int(fig.get_figwidth() * fig.dpi)
+                    series = []
+                    for scenario in self.scenarios.values():
+                        y = scenario['arrays'][k]
+                        if not show_plots and y.size > 4 * width_px:
+                            series.append(_decimate_minmax(y, width_px))
+                        else:
+                            series.append((np.arange(y.size, dtype=np.float32), y))
+                    scenario_handles = []
+                    if show_markers:
+                        for scenario_idx, (scenario_name, scenario) in enumerate(self.scenarios.items()):
+                            ax.plot(
+                                *series[scenario_idx],
+                                label=scenario['label'],
+                                linestyle=styles[scenario_idx],
+                                marker=markers_[scenario_idx],
+                                color=colors[scenario_idx],
+                                markersize=5,
+                                linewidth=2,
+                                rasterized=True
+                            )
+                    else:
+                        # Fast path: stack all scenarios into one (N_scenarios, T) array and draw a single collection
+                        x = np.vstack([xs for xs, _ in series]).astype(np.float32)
+                        data = np.vstack([ys for _, ys in series])
+                        segments = np.ma.masked_invalid(np.stack([x, data], axis=-1))
+                        lc = LineCollection(segments, colors=colors, linestyles=styles, linewidths=2, rasterized=True)
+                        ax.add_collection(lc)
+                        ax.autoscale_view()
+                        # Legend proxies (empty lines) so each scenario keeps its own legend entry
+                        scenario_handles = [
+                            Line2D([], [], color=color, linestyle=style, linewidth=2, label=scenario['label'])
+                            for scenario, color, style in zip(self.scenarios.values(), colors, styles)
+                        ]
+                    # Plot reference_profile if available and not all None, and if key is not 'soc'
+                    if ref_profile_to_plot is not None and k != 'soc_normal':
+                        ax.plot(ref_profile_to_plot, label='reference_profile', linestyle='--', color='black', linewidth=2)
+                    ax.set_title(f"Comparison: {k}")
+                    ax.set_xlabel("Hour")
+                    #plt.ylabel("Power [kWh]")
+                    # Combined legend if tariffs were plotted
+                    h1, l1 = ax.get_legend_handles_labels()
+                    h1 = scenario_handles + h1
+                    l1 = [h.get_label() for h in scenario_handles] + l1
+                    if ax2 is not None:
+                        h2, l2 = ax2.get_legend_handles_labels()
+                        ax.legend(h1 + h2, l1 + l2, loc=legend_loc)
+                    else:
+                            ax.legend(h1, l1, title='Left y-axis: Power [kWh]', loc=legend_loc)
+                    ax.grid(True)
+                    fig.tight_layout()
+                    if save_plots:
+                        filename = get_unique_filename(os.path.join(img_dir, f"{k}_comparison_{scenario_names}.png"))
+                        if filename:
+                            # if fixed_da add suffix
+                            if fixed_da and isinstance(fixed_da,(int,float)):
+                                filename = filename.replace(".png", f"_fixedDA{fixed_da}.png")
+                            if vary_tariff:
+                                filename = filename.replace(".png", f"_varyTariff.png")
                         
-                    os.makedirs(os.path.dirname(filename), exist_ok=True)
-                    plt.savefig(filename)
-                    print(f"Plot saved: {filename}")
-                else:
-                    print(f"Warning: Could not generate filename for plot {k}. Plot not saved.")
-            if show_plots:
-                plt.show()
+                            future = executor.submit(fig.savefig, filename, pil_kwargs=_PNG_PIL_KWARGS, bbox_inches=None)
+                            saves.append((future, filename))
+                            if long_series:
+                                futures_wait([future])  # written before the rc_context is left
+                            if recycle:
+                                slots[slot][1] = future
+                        else:
+                            print(f"Warning: Could not generate filename for plot {k}. Plot not saved.")
+        # Leaving the with-block waits for the last writes; a failed save is raised here
+        for future, filename in saves:
+            future.result()
+            print(f"Plot saved: {filename}")
+        if show_plots:
+            plt.show()
+        if return_figures:
+            self._last_figures = figures
+            return figures
+        # Release the figures so pyplot does not keep them open
+        for fig in figures:
+            plt.close(fig)
+
+def _load_da_prices(path_str):
+    """Return the DA price series from a bus params JSON file (parsed through load_json's cache)."""
+    return load_json(path_str)[0].get("energy_price_DKK_per_kWh", None)
+
 
 def plot_da_price():
 
     """Plot DA prices from question_1a bus params and save to img/other."""
-    import json
-    from pathlib import Path
-    import os 
-    import matplotlib.pyplot as plt
-    path = Path('data/question_1a/bus_params.json')
-    r = json.loads(path.read_text())
-    DA_prices = r[0].get("energy_price_DKK_per_kWh", None)
+    DA_prices = _load_da_prices('data/question_1a/bus_params.json')
     img_dir = os.path.join("img/other")
     os.makedirs(img_dir, exist_ok=True)
-    plt.figure(figsize=(10, 5))
-    plt.plot(DA_prices, label="DA Price", color="tab:blue", marker="o")
-    plt.xlabel("Hour")
-    plt.ylabel("DA Price [DKK/kWh]")
-    plt.title(f"Day-Ahead Price")
-    plt.legend()
-    plt.grid(True, linestyle="--", alpha=0.5)
+    fig, ax = _new_figure((10, 5))
+    ax.plot(DA_prices, label="DA Price", color="tab:blue", marker="o")
+    ax.set_xlabel("Hour")
+    ax.set_ylabel("DA Price [DKK/kWh]")
+    ax.set_title(f"Day-Ahead Price")
+    ax.legend()
+    ax.grid(True, linestyle="--", alpha=0.5)
     filename = os.path.join(img_dir, f"da_price.png")
-    plt.savefig(filename)
-    plt.close()
+    fig.savefig(filename, pil_kwargs=_PNG_PIL_KWARGS)
     print(f"DA price plot saved to {filename}")
 
 
@@ -291,9 +488,6 @@ def plot_duals_from_txt(dual_file_path, include=None, exclude=None, show_plot=Tr
     plots each base name as a line over time. Non-indexed (scalar) duals are printed to console.
     By default, excludes 'excl' series and suppresses 'balance'/'soc_update' unless explicitly included.
     """
-    import re
-    import os
-    import matplotlib.pyplot as plt
 
     if not os.path.exists(dual_file_path):
         print(f"Dual file not found: {dual_file_path}")
@@ -326,34 +520,29 @@ def plot_duals_from_txt(dual_file_path, include=None, exclude=None, show_plot=Tr
         print(f"Using duals file: {dual_file_path}")
 
     # Parse file
-    series = {}         # base_name -> {idx:int -> value:float}
+    series = {}         # base_name -> DataFrame with columns idx/val, sorted by idx
     scalars = {}        # name -> value
     scenario_title = os.path.basename(dual_file_path)
     try:
-        with open(dual_file_path, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if not line or ':' not in line:
-                    # Try to parse scenario name from header
-                    if line.lower().startswith('dual values') and ':' in line:
-                        scenario_title = line.split(':', 1)[-1].strip()
-                    continue
-                name, val_str = line.split(':', 1)
-                name = name.strip()
-                try:
-                    val = float(val_str.strip())
-                except ValueError:
-                    continue
-                m = re.match(r"^(.*?)[_\s](\d+)$", name)
-                if m:
-                    base = m.group(1)
-                    idx = int(m.group(2))
-                    series.setdefault(base, {})[idx] = val
-                else:
-                    scalars[name] = val
+        df = pd.read_csv(dual_file_path, sep=':', header=None, names=['name', 'val'], engine='c',
+                         skip_blank_lines=True, on_bad_lines='skip')
     except Exception as e:
         print(f"Failed to read dual file: {e}")
         return
+    # Non-numeric rows (e.g. the header line) are dropped
+    df['val'] = pd.to_numeric(df['val'], errors='coerce')
+    df = df.dropna()
+    df['name'] = df['name'].astype(str).str.strip()
+    parts = df['name'].str.extract(_DUAL_RX)
+    indexed = parts['idx'].notna()
+    timeseries = pd.DataFrame({
+        'base': parts.loc[indexed, 'base'],
+        'idx': parts.loc[indexed, 'idx'].astype(int),
+        'val': df.loc[indexed, 'val'],
+    }).drop_duplicates(subset=['base', 'idx'], keep='last')
+    for base, grp in timeseries.groupby('base', sort=False):
+        series[base] = grp.sort_values('idx')
+    scalars = dict(zip(df.loc[~indexed, 'name'], df.loc[~indexed, 'val']))
 
     # Report if there are any 'excl' entries and skip them in plotting/printing
     # Also exclude if 'soc_update' or 'balance' in bases or names
@@ -403,23 +592,21 @@ def plot_duals_from_txt(dual_file_path, include=None, exclude=None, show_plot=Tr
         return True
 
     # Prepare plot
-    plt.figure(figsize=(11, 6))
-    color_cycle = plt.rcParams['axes.prop_cycle'].by_key()['color']
-    import itertools
-    style_cycle = itertools.cycle(['-', '--', '-.', ':'])
-    marker_cycle = itertools.cycle(['o', 's', 'D', '^', 'v', 'x'])
-    color_cycle_iter = itertools.cycle(color_cycle)
+    _load_matplotlib()
+    fig, ax = _new_figure((11, 6), interactive=show_plot)
+    style_cycle = itertools.cycle(_LINE_STYLES)
+    marker_cycle = itertools.cycle(_DUAL_MARKERS)
+    color_cycle_iter = itertools.cycle(_DEFAULT_COLORS)
 
     any_series = False
     for base, points in series.items():
         if not allowed(base):
             continue
-        if not points:
+        if points.empty:
             continue
-        idxs = sorted(points.keys())
-        xs = idxs
-        ys = [points[i] for i in idxs]
-        plt.plot(
+        xs = points['idx'].to_numpy()
+        ys = points['val'].to_numpy()
+        ax.plot(
             xs,
             ys,
             label=base,
@@ -449,19 +636,20 @@ def plot_duals_from_txt(dual_file_path, include=None, exclude=None, show_plot=Tr
                 print(f"  {k}: {v}")
         return
 
-    plt.title(f"Dual values over time - {scenario_title}")
-    plt.xlabel("Hour")
-    plt.ylabel("Dual value")
-    plt.grid(True, linestyle='--', alpha=0.5)
-    plt.legend()
-    plt.tight_layout()
+    ax.set_title(f"Dual values over time - {scenario_title}")
+    ax.set_xlabel("Hour")
+    ax.set_ylabel("Dual value")
+    ax.grid(True, linestyle='--', alpha=0.5)
+    ax.legend(loc='upper right')
+    fig.tight_layout()
 
     if save_plot:
         os.makedirs(out_dir, exist_ok=True)
         base = os.path.splitext(os.path.basename(dual_file_path))[0]
         out_path = os.path.join(out_dir, f"{base}.png")
-        plt.savefig(out_path)
+        fig.savefig(out_path, pil_kwargs=_PNG_PIL_KWARGS)
         print(f"Duals plot saved: {out_path}")
     if show_plot:
         plt.show()
+        plt.close(fig)
 
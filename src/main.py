@@ -3,65 +3,120 @@ Project entry point for running optimization scenarios and generating outputs.
 
 This script configures which assignment question and scenarios to run,
 executes the optimization via Runner, prints summaries, and can plot duals.
+Defaults are set in main(); each can be overridden from the command line
+(see `python src/main.py --help`).
 """
 
+import argparse
 from pathlib import Path
-from runner.runner import Runner
-from utils.utils import print_all_scenarios, get_all_scenarios, select_scenarios
 
+QUESTIONS = ["question_1a", "question_1b", "question_1c", "question_2b"]
 
-def main():
+
+def main(question='question_2b', scenarios="All", vary_tariff=False, fixed_da=2.0,
+         show_plots=False, save_plots=True, num_hours=24, print_size="small", workers=1,
+         exclusivity="big_m", mip_gap=None, solver_params=None):
     """Run configured scenarios end-to-end.
 
     Steps:
     - Select question and discover scenarios
     - Optionally filter scenarios to run
     - Configure flags (vary_tariff, fixed_da, plotting, horizon)
-    - Execute all simulations using Runner
+    - Execute all simulations using Runner (in `workers` processes, 0 = one per CPU;
+      `mip_gap` sets Gurobi's relative MIPGap for the sos1 MIP, `solver_params` any other
+      Gurobi parameters as a name -> value dict)
     - Print scenario summaries and export duals
-    - Optionally plot duals from exported .txt files
+    - Plot the duals exported by this run (when plots are saved or shown)
     """
-    # question_1a, question_1b, question_1c, or question_2b
-    question = 'question_2b'
-    
+    # Heavy imports (gurobipy, matplotlib, pandas) only once there is work to do
+    from runner.runner import Runner
+    from utils.utils import print_all_scenarios, get_all_scenarios, select_scenarios
+
     # Load all available scenarios
     scenario_files = get_all_scenarios(question=question)
     print(f"Available scenarios: {list(scenario_files.keys())}")
-    
-    scenarios = "All" # "All" or list of specific scenario names | See scenario names in _scenario_names.json, case insensitive
-    scenario_files = select_scenarios(scenario_files, scenarios) 
+
+    # "All" or list of specific scenario names | See scenario names in _scenario_names.json, case insensitive
+    scenario_files = select_scenarios(scenario_files, scenarios)
 
     input_path = Path(f'data/{question}/')
-    vary_tariff=False # Vary tariff [True,False]
-    fixed_da= 2.0 # fixed_da [None or float]
-    show_plots = False # [True,False] Show plots during execution
-    save_plots = True # [True,False] Save plots during execution
-    num_hours = 24 # Number of hours to simulate
-    print_size = "small" # small or large print of results
-
-    runner = Runner(show_plots=show_plots, 
+
+    params = dict(solver_params or {})
+    if mip_gap is not None:
+        params["MIPGap"] = mip_gap
+
+    runner = Runner(show_plots=show_plots,
                     save_plots=save_plots,
                     question=question,
                     num_hours=num_hours,
                     vary_tariff=vary_tariff,
-                    fixed_da=fixed_da) 
+                    fixed_da=fixed_da,
+                    max_workers=workers or None,
+                    exclusivity=exclusivity,
+                    params=params)
     scenario_results = runner.run_all_simulations(question, input_path, scenario_files)
-    print_all_scenarios(scenario_results,
-                        mode=print_size,
-                        question=question,
-                        vary_tariff=vary_tariff,
-                        fixed_da=fixed_da) 
-    
-    # Plot duals
-    
-    from data_ops.data_visualizer import plot_duals_from_txt
-    duals_dir = Path(f"txt/{question}")
-    for dual_file in duals_dir.glob("duals_*.txt"):
-        plot_duals_from_txt(str(dual_file), 
-                            save_plot=True, 
-                            show_plot=False, 
-                            out_dir=f"img/duals/{question}/")
+    dual_files = print_all_scenarios(scenario_results,
+                                     mode=print_size,
+                                     question=question,
+                                     vary_tariff=vary_tariff,
+                                     fixed_da=fixed_da)
+
+    # Plot the duals this run exported (none in sos1 mode); older files in txt/ are left alone
+    if dual_files and (save_plots or show_plots):
+        from data_ops.data_visualizer import plot_duals_from_txt
+        for dual_file in dual_files:
+            plot_duals_from_txt(dual_file,
+                                save_plot=save_plots,
+                                show_plot=show_plots,
+                                out_dir=f"img/duals/{question}/")
 
-if __name__ == "__main__":
-    main()
 
+def _optional_float(value):
+    """argparse type for a float that may also be 'none'."""
+    return None if value.lower() == "none" else float(value)
+
+
+def _solver_param(value):
+    """argparse type for a Gurobi parameter given as NAME=VALUE (VALUE parsed as int or float if possible)."""
+    name, sep, raw = value.partition("=")
+    if not sep or not name:
+        raise argparse.ArgumentTypeError(f"expected NAME=VALUE, got {value!r}")
+    for convert in (int, float):
+        try:
+            return name, convert(raw)
+        except ValueError:
+            pass
+    return name, raw
+
+
+def parse_args(argv=None):
+    """Parse command-line overrides for main(); defaults match main()'s signature."""
+    parser = argparse.ArgumentParser(description="Run optimization scenarios for an assignment question.")
+    parser.add_argument("--question", choices=QUESTIONS, default="question_2b")
+    parser.add_argument("--scenarios", nargs="+", default="All",
+                        help="'All' or scenario names from _scenario_names.json (case insensitive)")
+    parser.add_argument("--vary-tariff", action=argparse.BooleanOptionalAction, default=False,
+                        help="randomly scale import/export tariffs per hour")
+    parser.add_argument("--fixed-da", type=_optional_float, default=2.0,
+                        help="constant DA price, or 'none' to use the input prices")
+    parser.add_argument("--show-plots", action=argparse.BooleanOptionalAction, default=False)
+    parser.add_argument("--save-plots", action=argparse.BooleanOptionalAction, default=True)
+    parser.add_argument("--num-hours", type=int, default=24, help="number of hours to simulate")
+    parser.add_argument("--print-size", choices=["small", "large"], default="small")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="solve scenarios in this many processes (0 = one per CPU)")
+    parser.add_argument("--exclusivity", choices=["big_m", "sos1"], default="big_m",
+                        help="charge/discharge exclusivity: relaxed big-M (LP/QP, with duals) "
+                             "or exact SOS1 on charge/discharge and import/export (MIP, no duals)")
+    parser.add_argument("--mip-gap", type=float, default=None,
+                        help="relative MIP gap at which Gurobi stops (sos1 mode only; default Gurobi's 1e-4)")
+    parser.add_argument("--solver-param", dest="solver_params", type=_solver_param, action="append",
+                        metavar="NAME=VALUE",
+                        help="extra Gurobi parameter, e.g. Presolve=2 (repeatable; pool workers keep Threads=1)")
+    args = parser.parse_args(argv)
+    args.solver_params = dict(args.solver_params or [])
+    return args
+
+
+if __name__ == "__main__":
+    main(**vars(parse_args()))
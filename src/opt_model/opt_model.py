@@ -4,27 +4,67 @@ Contains Consumer, DER, Grid, and EnergySystemModel, and the helper to_list.
 The main entry is EnergySystemModel.build_and_solve_standardized.
 """
 
+import hashlib
+import itertools
+import multiprocessing
+from collections import OrderedDict
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+
 import gurobipy as gp
-from gurobipy import GRB, quicksum
-from gurobipy import Var
+from gurobipy import GRB
 import numpy as np 
 
-# Utility function: ensures that a parameter (scalar or list) is returned as a list of hourly values.
+# Gurobi environment shared by all models in this process (see _gurobi_env)
+_ENV = None
+
+def _gurobi_env():
+    """Return the process-wide Gurobi environment, starting it on first use.
+
+    Output is switched off before the environment starts, so neither the license
+    banner nor solver logs are printed for any model built on it.
+    """
+    global _ENV
+    if _ENV is None:
+        env = gp.Env(empty=True)
+        env.setParam("OutputFlag", 0)
+        env.setParam("LogToConsole", 0)
+        env.start()
+        _ENV = env
+    return _ENV
+
+# Utility function: ensures that a parameter (scalar or list) is returned as an array of hourly values.
 # This is important for time-series modeling in energy systems, where some parameters may be constant or vary by hour.
 def to_list(v, num_hours,scale=1.0):
-    """Return an hourly list from a scalar or list, applying scale.
+    """Return an hourly float array from a scalar or list, applying scale.
 
     If v is a list, multiply each element by scale. If v is a scalar,
     repeat it for num_hours and apply scale. If v is falsy and not zero,
-    return a list of None to indicate missing data.
+    return an array of NaN to indicate missing data.
     """
     if isinstance(v, list):
-        return [vi * scale for vi in v]
+        return np.asarray(v, dtype=np.float64) * scale
     else:
         if v or v==0:
-            return [v * scale for _ in range(num_hours)]
+            return np.full(num_hours, float(v) * scale)
         else:
-            return [None] * num_hours
+            return np.full(num_hours, np.nan)
+
+@lru_cache(maxsize=None)
+def _tariff_scale(num_hours):
+    """Hourly tariff scale factors for vary_tariff, drawn once per horizon (read-only).
+
+    A private RandomState(42) gives the same draws as np.random.seed(42) followed by
+    np.random.uniform, without resetting NumPy's global random state on every solve.
+    """
+    scale = np.random.RandomState(42).uniform(0.5, 1.5, num_hours)
+    scale.flags.writeable = False
+    return scale
+
+def _copy_results(results, results_arrays):
+    """Copy a solve's results so callers and the result cache never share a series, the duals or an array."""
+    results = {k: v.copy() if isinstance(v, (list, dict)) else v for k, v in results.items()}
+    return results, {k: arr.copy() for k, arr in results_arrays.items()}
 
 # Consumer class: holds load preferences and flexibility
 class Consumer:
@@ -35,128 +75,96 @@ class Consumer:
     - Can be extended for flexible loads and discomfort calculation (how much the consumer dislikes shifting load from a reference profile)
     """
     def __init__(self, usage_preference, appliance_params, reference_profile=None, flexibility_params=None,scale={}):
-        """Initialize Consumer with preferences, appliance params, and scales."""
+        """Initialize Consumer with preferences, appliance params, and scales.
+
+        The nested input dicts are read once here into flat attributes; the getters return those,
+        so later changes to scale or the input dicts are not picked up.
+        """
         self.usage_preference = usage_preference
         self.appliance_params = appliance_params
         self.reference_profile = reference_profile  # For discomfort calculation
         self.flexibility_params = flexibility_params  # For future flexibility features
         self.scale = scale
 
+        load_pref = usage_preference[0]["load_preferences"][0]
+        # Missing/empty storage entries fall back to the defaults below
+        storage = (appliance_params.get("storage") or [{}])[0]
+        storage_pref = (usage_preference[0].get("storage_preferences") or [{}])[0]
+
+        # Total energy requirement for the day as equivalent full hours (scaled); unset means no bound
+        min_total = load_pref["min_total_energy_per_day_hour_equivalent"]
+        max_total = load_pref["max_total_energy_per_day_hour_equivalent"]
+        self.min_energy_requirement = min_total*scale.get("load_scale",1.0) if min_total else 0.0
+        self.max_energy_requirement = max_total*scale.get("load_scale",1.0) if max_total else float('inf')
+        self.reference_profile_ratio = load_pref.get("hourly_profile_ratio")
+        self.max_load_per_hour = appliance_params["load"][0].get("max_load_kWh_per_hour")
+
+        # Battery parameters
+        self.storage_capacity = scale.get("storage_capacity_scale",1)*storage.get("storage_capacity_kWh",0)
+        self.battery_price_coeff = storage.get("battery_price_coeff",1)*scale.get("battery_price_coeff_scale",1)
+        self.max_charging_power = scale.get("max_charge_power_scale",1)*storage.get("max_charging_power_ratio",0)
+        self.max_discharging_power = scale.get("max_discharge_power_scale",1)*storage.get("max_discharging_power_ratio",0)
+        self.charging_efficiency = storage.get("charging_efficiency",1)
+        self.discharging_efficiency = storage.get("discharging_efficiency",1)
+        self.initial_soc = scale.get("initial_soc_ratio", 1)*storage_pref.get("initial_soc_ratio", 0)
+        self.minimum_soc = scale.get("soc_min", 1)*storage_pref.get("minimum_soc_ratio", 0)
+        self.final_soc = scale.get("final_soc_ratio", 1)*storage_pref.get("final_soc_ratio", 0)
+
     def get_minimum_energy_requirement(self):
         """Minimum equivalent full-hours energy requirement (scaled)."""
-        # Returns total required energy for the day as equivalent full hours
         # This is the physical constraint for total consumption by appliances
-        min = self.usage_preference[0]["load_preferences"][0]["min_total_energy_per_day_hour_equivalent"]
-        if not min:
-            return 0.0
-        else:
-            return min*self.scale.get("load_scale",1.0)
+        return self.min_energy_requirement
     
     def get_maximum_energy_requirement(self):
         """Maximum equivalent full-hours energy requirement (scaled)."""
-        # Returns total required energy for the day as equivalent full hours
         # This is the physical constraint for total consumption by appliances
-        max = self.usage_preference[0]["load_preferences"][0]["max_total_energy_per_day_hour_equivalent"]
-        if not max:
-            return float('inf')
-        else:
-            return max*self.scale.get("load_scale",1.0)
+        return self.max_energy_requirement
         
     def get_reference_profile(self, num_hours):
-        """Reference load profile list for discomfort calculation (scaled)."""
+        """Reference load profile array for discomfort calculation (scaled)."""
         # Returns the reference load profile (kWh) for discomfort calculation
-        v = self.usage_preference[0].get("load_preferences",{})[0].get("hourly_profile_ratio")
-        return to_list(v, num_hours, self.scale.get("reference_profile_scale", 1.0))
-        
+        return to_list(self.reference_profile_ratio, num_hours, self.scale.get("reference_profile_scale", 1.0))
 
     def get_max_load_per_hour(self):
         """Maximum load per hour (kWh)."""
-        # Returns max load per hour as a list (kWh)
         # This models the physical limit of appliances at each hour
-        v = self.appliance_params["load"][0].get("max_load_kWh_per_hour")
-        return v
+        return self.max_load_per_hour
     
     def get_storage_capacity(self):
         """Battery/storage capacity (kWh), scaled by scenario."""
-        v = self.appliance_params.get("storage",[{}])
-        if v:
-            v = v[0].get("storage_capacity_kWh",0)
-        else:
-            v = 0
-        return self.scale.get("storage_capacity_scale",1)*v
+        return self.storage_capacity
     
     def get_battery_price_coeff(self):
         """Battery price coefficient used in question 2b objective penalty."""
-        v = self.appliance_params.get("storage",[{}])
-        if v:
-            v = v[0].get("battery_price_coeff",1)
-        else:
-            v = 1
-        return v*self.scale.get("battery_price_coeff_scale",1)
+        return self.battery_price_coeff
 
     def get_max_charging_power(self):
         """Max charging power ratio per hour, scaled."""
-        v = self.appliance_params.get("storage",[{}])
-        if v: 
-            v = v[0].get("max_charging_power_ratio",0)
-        else:
-            v = 0
-        return self.scale.get("max_charge_power_scale",1)*v
+        return self.max_charging_power
     
     def get_max_discharging_power(self):
         """Max discharging power ratio per hour, scaled."""
-        v = self.appliance_params.get("storage",[{}])
-        if v: 
-            v=v[0].get("max_discharging_power_ratio",0)
-        else:
-            v = 0
-        return self.scale.get("max_discharge_power_scale",1)*v
+        return self.max_discharging_power
     
     def get_charging_efficiency(self):
         """Charging efficiency (0-1)."""
-        v = self.appliance_params.get("storage")
-        
-        if v: 
-            v = v[0].get("charging_efficiency",1)
-        else:
-            v = 1
-        return v
+        return self.charging_efficiency
     
     def get_discharging_efficiency(self):
         """Discharging efficiency (0-1)."""
-        v = self.appliance_params.get("storage")
-        if v:
-            v = v[0].get("discharging_efficiency", 1)
-        else:
-            v = 1
-        return v
+        return self.discharging_efficiency
 
     def get_initial_soc(self):
         """Initial state of charge ratio (0-1), scaled if configured."""
-        v = self.usage_preference[0].get("storage_preferences")
-        if v:
-            v = v[0].get("initial_soc_ratio", 0)
-        else:
-            v = 0
-        return self.scale.get("initial_soc_ratio", 1) * v
+        return self.initial_soc
 
     def get_minimum_soc(self):
         """Minimum state of charge ratio (0-1), scaled if configured."""
-        v = self.usage_preference[0].get("storage_preferences")
-        if v:
-            v = v[0].get("minimum_soc_ratio", 0)
-        else:
-            v = 0
-        return self.scale.get("soc_min", 1) * v
+        return self.minimum_soc
 
     def get_final_soc(self):
         """Final state of charge ratio (0-1), scaled if configured."""
-        v = self.usage_preference[0].get("storage_preferences")
-        if v:
-            v = v[0].get("final_soc_ratio", 0)
-        else:
-            v = 0
-        return self.scale.get("final_soc_ratio", 1) * v
+        return self.final_soc
 
 
 # DER class: holds PV and other distributed resources
@@ -172,18 +180,19 @@ class DER:
         self.battery = battery  # For future battery integration
         self.scale = scale
         self.appliance_params = appliance_params
+        # Read once from the nested inputs (see Consumer)
+        self.pv_profile_ratio = der_production[0].get("hourly_profile_ratio")
+        self.max_pv_capacity = appliance_params["DER"][0].get("max_power_kW")
 
     def get_pv_profile(self, num_hours):
         """Return hourly PV production profile (kWh), scaled."""
         # Returns PV hourly profile (kWh produced each hour)
         # This is the physical renewable generation available to the consumer
-        v = self.der_production[0].get("hourly_profile_ratio")
-        return to_list(v, num_hours,self.scale.get("pv_scale",1.0))
+        return to_list(self.pv_profile_ratio, num_hours,self.scale.get("pv_scale",1.0))
     
     def get_max_pv_capacity(self):
         """Return max PV capacity (kW) from appliance parameters."""
-        v = self.appliance_params["DER"][0].get("max_power_kW")
-        return v
+        return self.max_pv_capacity
 
 # Grid class: holds tariffs and grid limits
 class Grid:
@@ -194,6 +203,13 @@ class Grid:
         """Initialize Grid with bus params and scales."""
         self.bus_params = bus_params
         self.scale = scale
+        # Read once from the nested inputs (see Consumer)
+        bus = bus_params[0]
+        self.import_tariff = bus.get("import_tariff_DKK/kWh")
+        self.export_tariff = bus.get("export_tariff_DKK/kWh")
+        self.energy_price = bus.get("energy_price_DKK_per_kWh")
+        self.max_import = bus.get("max_import_kW")*scale.get("max_import_kW",1.0)
+        self.max_export = bus.get("max_export_kW")*scale.get("max_export_kW",1.0)
 
     """
     Represents the grid connection for the consumer.
@@ -204,49 +220,340 @@ class Grid:
     def get_import_tariff(self, num_hours):
         """Hourly import tariff list (DKK/kWh), scaled."""
         # Cost to import electricity from the grid (DKK/kWh)
-        v = self.bus_params[0].get("import_tariff_DKK/kWh")
-        return to_list(v, num_hours,self.scale.get("import_tariff_scale",1.0))
+        return to_list(self.import_tariff, num_hours,self.scale.get("import_tariff_scale",1.0))
 
     def get_export_tariff(self, num_hours):
         """Hourly export tariff list (DKK/kWh), scaled."""
         # Revenue for exporting electricity to the grid (DKK/kWh)
-        v = self.bus_params[0].get("export_tariff_DKK/kWh")
-        return to_list(v, num_hours,self.scale.get("export_tariff_scale",.10))
+        return to_list(self.export_tariff, num_hours,self.scale.get("export_tariff_scale",.10))
 
     def get_energy_price(self, num_hours):
         """Hourly DA energy price list (DKK/kWh), scaled."""
         # Market price for electricity (DKK/kWh)
-        v = self.bus_params[0].get("energy_price_DKK_per_kWh")
-        return to_list(v, num_hours,self.scale.get("price_scale",1.0))
+        return to_list(self.energy_price, num_hours,self.scale.get("price_scale",1.0))
 
     def get_max_import(self):
         """Max import power (kW), scaled."""
         # Maximum power that can be imported from the grid each hour (kW)
-        v = self.bus_params[0].get("max_import_kW")
-        return v* self.scale.get("max_import_kW",1.0)
+        return self.max_import
 
     def get_max_export(self):
         """Max export power (kW), scaled."""
         # Maximum power that can be exported to the grid each hour (kW)
-        v = self.bus_params[0].get("max_export_kW")
-        return v*self.scale.get("max_export_kW",1.0)
+        return self.max_export
     
 
 
 # Main energy system optimization model
 class EnergySystemModel:
-    """Encapsulates the optimization model for the energy system."""
+    """Encapsulates the optimization model for the energy system.
+
+    The Gurobi model is built once per (question, num_hours, exclusivity, names, has_battery) and reused:
+    replacing consumer/der/grid and calling build_and_solve_standardized again only updates bounds,
+    right-hand sides, coefficients and the objective. LP/QP solves start cold so their duals do not
+    depend on which scenario was solved before; sos1 MIP solves start from the previous solution.
+    """
+
+    # Hourly decision variables, one column each in the (num_hours, len(HOURLY_VARIABLES)) matrix variable
+    HOURLY_VARIABLES = ["p_import", "p_export", "p_load", "p_pv_actual", "z",
+                        "p_bat_charge", "p_bat_discharge", "soc"]
+
+    # Columns left out of the model when there is no battery (reported as zeros)
+    BATTERY_VARIABLES = ("z", "p_bat_charge", "p_bat_discharge", "soc")
+
+    EXCLUSIVITY_MODES = ("big_m", "sos1")
 
-    def __init__(self, consumer, der, grid):
-        """Initialize with data classes for consumer, DER, and grid."""
+    # Objective builder per question, picked once when the model is built (other questions use the 1b/1c form)
+    OBJECTIVES = {"question_1a": "_profit_objective",
+                  "question_1b": "_discomfort_objective",
+                  "question_1c": "_discomfort_objective",
+                  "question_2b": "_battery_sizing_objective"}
+
+    # Power limit of charge/discharge in question 2b (capacity is a variable there, so no scenario bound applies)
+    BATTERY_BIG_M = 1e3
+
+    # Number of solved input sets whose (results, objVal) are kept for repeated queries
+    RESULT_CACHE_SIZE = 64
+
+    def __init__(self, consumer, der, grid, threads=None, exclusivity="big_m", params=None):
+        """Initialize with data classes for consumer, DER, and grid.
+
+        threads caps Gurobi's thread count (None keeps Gurobi's default), e.g. 1 when
+        several models are solved side by side in a process pool.
+        exclusivity selects how simultaneous charge/discharge is prevented: "big_m" (default)
+        relaxes it with the continuous z_t, so the model stays an LP/QP with duals; "sos1"
+        enforces it exactly with SOS1 sets per hour (charge/discharge and import/export),
+        making it a MIP without duals.
+        params sets further Gurobi parameters (name -> value) on top of the defaults in _build,
+        e.g. {"MIPFocus": 1} for the sos1 MIP.
+        """
+        if exclusivity not in self.EXCLUSIVITY_MODES:
+            raise ValueError(f"exclusivity must be one of {self.EXCLUSIVITY_MODES}, got {exclusivity!r}")
         self.consumer = consumer
         self.der = der
         self.grid = grid
+        self.threads = threads
+        self.exclusivity = exclusivity
+        self.params = dict(params or {})
         self.model = None
         self.results = None
+        self.results_arrays = None # hourly variable -> ndarray of the last optimal solve
+        self._structure = None  # (question, num_hours, exclusivity, names, has_battery) the current Gurobi model was built for
+        self._mip_start = None  # hourly solution of the last optimal MIP (sos1) solve, the next solve's MIP start
+        self._result_cache = OrderedDict()  # _input_key -> private copies of (results, results_arrays, objVal), least recently used first
+
+    @classmethod
+    def solve_many(cls, problems, max_workers=None, model_kwargs=None, **solve_kwargs):
+        """Solve independent problems in a process pool; yields (results, objVal) in input order.
+
+        Args:
+            problems: Iterable of (consumer, der, grid) tuples.
+            max_workers: Pool size (None = CPU count).
+            model_kwargs: Extra EnergySystemModel arguments (e.g. exclusivity).
+            **solve_kwargs: Passed to build_and_solve_standardized (question, num_hours, ...).
+
+        Each worker process builds its models on its own Gurobi environment, reuses one model
+        across the problems it receives and runs Gurobi single-threaded, so the workers do not
+        oversubscribe the CPU.
+        """
+        model_kwargs = dict(model_kwargs or {}, threads=1)
+        # A Threads entry in params would override threads=1 (Gurobi parameter names are case-insensitive)
+        model_kwargs["params"] = {name: value for name, value in (model_kwargs.get("params") or {}).items()
+                                  if name.lower() != "threads"}
+        # Spawned rather than forked: a forked child would inherit this process's Gurobi environment
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+            yield from executor.map(_solve_one, problems, itertools.repeat((model_kwargs, solve_kwargs)))
+
+    def invalidate_cache(self):
+        """Discard the cached Gurobi model so the next solve rebuilds it from scratch.
+
+        Needed only for structural changes that the (question, num_hours, exclusivity, names, has_battery) key
+        does not capture. Memoized results are dropped as well.
+        """
+        if self.model is not None:
+            self.model.dispose()
+        self.model = None
+        self._structure = None
+        self._mip_start = None
+        self._result_cache.clear()
+
+    def _input_key(self, question, num_hours, vary_tariff, fixed_da, profiles):
+        """Return a key identifying every input of a solve, for memoizing its results.
+
+        The hourly profiles (as read by build_and_solve_standardized) and the scalar consumer/DER/grid
+        parameters are hashed (blake2b) together with the solve options.
+        """
+        consumer, der, grid = self.consumer, self.der, self.grid
+        scalars = [der.get_max_pv_capacity(), grid.get_max_import(), grid.get_max_export(),
+                   consumer.get_max_load_per_hour(), consumer.get_minimum_energy_requirement(),
+                   consumer.get_maximum_energy_requirement(), consumer.get_storage_capacity(),
+                   consumer.get_battery_price_coeff(), consumer.get_max_charging_power(),
+                   consumer.get_max_discharging_power(), consumer.get_charging_efficiency(),
+                   consumer.get_discharging_efficiency(), consumer.get_initial_soc(), consumer.get_final_soc(),
+                   getattr(consumer, 'discomfort_cost_per_kWh', 1.0)]
+        digest = hashlib.blake2b(digest_size=16)
+        for values in (*profiles, scalars):
+            digest.update(np.asarray(values, dtype=np.float64).tobytes())
+        return (question, num_hours, self.exclusivity, bool(vary_tariff), fixed_da, digest.digest())
+
+    def _build(self, question, num_hours, names=False, has_battery=True):
+        """Create the Gurobi variables and constraints for a question and horizon.
+
+        Scenario data enters as placeholder bounds, right-hand sides and coefficients,
+        which build_and_solve_standardized overwrites before every solve.
+        Variable and constraint names are only passed to Gurobi when names is set (debugging);
+        the row names used as dual keys are kept in self._row_names either way.
+        Without a battery (has_battery False) the battery columns and rows are left out entirely.
+        """
+        T = list(range(num_hours))
+
+        # Create model
+        model = gp.Model("pv_grid_profit_max", env=_gurobi_env()) # output is off in the shared env
+        model.ModelSense = GRB.MAXIMIZE
+        model.setParam("Method", 1) # Dual simplex: one deterministic vertex for the LP/QP solves
+        model.setParam("Presolve", 1) # Conservative presolve; the model is too small for aggressive reductions
+        if self.threads is not None:
+            model.setParam("Threads", self.threads)
+        for name, value in self.params.items():
+            model.setParam(name, value)
+
+        variables = {}
+        if question in ["question_2b"]:
+            # Battery size is a decision only in question 2b; elsewhere the capacity is a per-scenario
+            # constant written into the SOC rows' right-hand sides
+            variables["p_bat_cap"] = model.addVar(lb=0, name="p_bat_cap" if names else "")
+
+        # Add variables with bounds
+        # All hourly variables are added in one call; the row-major layout keeps them ordered hour by hour
+        columns = [v for v in self.HOURLY_VARIABLES if has_battery or v not in self.BATTERY_VARIABLES]
+        ub = np.full((num_hours, len(columns)), GRB.INFINITY)
+        # Exclusivity variable as continuous in [0,1]
+        if "z" in columns:
+            ub[:, columns.index("z")] = 1
+        var_names = np.array([[f"{v}_{t}" for v in columns] for t in T]) if names else ""
+        hourly = model.addMVar((num_hours, len(columns)), lb=0, ub=ub, vtype=GRB.CONTINUOUS, name=var_names)
+        for i, v in enumerate(columns):
+            variables[v] = hourly[:, i]
+        p_import, p_export = variables["p_import"], variables["p_export"]
+        p_load, p_pv_actual = variables["p_load"], variables["p_pv_actual"]
+
+        # -----------------------------
+        # Constraints
+        # -----------------------------
+        constraints = {}
+
+        # Row names in the order the rows are added, i.e. the order of model.getConstrs()
+        row_names = []
+
+        def hourly_names(base, hours=T):
+            labels = [f"{base}_{t}" for t in hours]
+            row_names.extend(labels)
+            return labels if names else ""
+
+        def scalar_name(label):
+            row_names.append(label)
+            return label if names else ""
+
+        # Energy requirement bounds
+        constraints["total_load_min"] = model.addLConstr(p_load.sum().item(), GRB.GREATER_EQUAL, 0, name=scalar_name("total_load_min"))
+        constraints["total_load_max"] = model.addLConstr(p_load.sum().item(), GRB.LESS_EQUAL, 0, name=scalar_name("total_load_max"))
+
+        if has_battery:
+            z = variables["z"]
+            # Battery variables
+            p_bat_charge, p_bat_discharge, soc = variables["p_bat_charge"], variables["p_bat_discharge"], variables["soc"]
+
+            # SOC limits
+            if question in ["question_2b"]:
+                constraints["soc_lim"] = model.addConstr(soc <= variables["p_bat_cap"], name=hourly_names("soc_lim"))
+            else:
+                constraints["soc_lim"] = model.addConstr(soc <= 0, name=hourly_names("soc_lim"))
+
+        # limits
+        constraints["import_lim"] = model.addConstr(p_import <= 0, name=hourly_names("import_lim"))
+        constraints["export_lim"] = model.addConstr(p_export <= 0, name=hourly_names("export_lim"))
+        constraints["pv_lim"] = model.addConstr(p_pv_actual <= 0, name=hourly_names("pv_lim"))
+        constraints["p_load_lim"] = model.addConstr(p_load <= 0, name=hourly_names("p_load_lim"))
+
+        if self.exclusivity == "sos1":
+            # At most one of charge/discharge and one of import/export is nonzero in each hour; y_t, z_t are left unused
+            if has_battery:
+                for ch_t, dis_t in zip(p_bat_charge.tolist(), p_bat_discharge.tolist()):
+                    model.addSOS(GRB.SOS_TYPE1, [ch_t, dis_t], [1, 2])
+                if question in ["question_2b"]:
+                    # Same power limit as the big-M rows of the big_m formulation, as bounds (1a-1c get
+                    # their scenario limits as bounds in build_and_solve_standardized)
+                    p_bat_charge.UB = self.BATTERY_BIG_M
+                    p_bat_discharge.UB = self.BATTERY_BIG_M
+            for imp_t, exp_t in zip(p_import.tolist(), p_export.tolist()):
+                model.addSOS(GRB.SOS_TYPE1, [imp_t, exp_t], [1, 2])
+
+        elif has_battery and question in ["question_2b"]:
+            # If battery capacity is a variable (question 2b), we need to use big M method in another fasion
+            # Where we don't multiply two variables
+            big_m = self.BATTERY_BIG_M  # A sufficiently large number
+
+            # Exclusivity (big-M with z_t)
+            constraints["charge_excl"] = model.addConstr(p_bat_charge <= big_m * z, name=hourly_names("charge_excl"))
+            constraints["discharge_excl"] = model.addConstr(p_bat_discharge <= big_m * (1 - z), name=hourly_names("discharge_excl"))
+
+        elif has_battery: # question 1a, 1b, 1c
+            # Battery exclusivity (Big-M logic) - use separate big-M for charge/discharge with continuous z_t
+            # Here we can use the actual max power since p_bat_cap is fixed and not a variable (set per scenario)
+            constraints["charge_excl"] = model.addConstr(p_bat_charge <= z, name=hourly_names("charge_exclusivity"))
+            constraints["discharge_excl"] = model.addConstr(p_bat_discharge <= 1 - z, name=hourly_names("discharge_exclusivity"))
+
+        # Hourly balance.
+        if has_battery:
+            constraints["balance"] = model.addConstr(
+                p_import
+                + p_pv_actual
+                + p_bat_discharge          # battery delivers this much to the bus
+                ==
+                p_load
+                + p_export
+                + p_bat_charge,            # this amount goes into battery (before storage losses)
+                name=hourly_names("balance")
+            )
+        else:
+            constraints["balance"] = model.addConstr(
+                p_import + p_pv_actual == p_load + p_export,
+                name=hourly_names("balance")
+            )
+
+        if has_battery:
+            # Initial SOC and final SOC (must end above final_soc); share of p_bat_cap set per scenario
+            if question in ["question_2b"]:
+                constraints["soc_init"] = model.addLConstr(soc[0].item(), GRB.EQUAL, variables["p_bat_cap"], name=scalar_name("soc_init"))
+                constraints["soc_end_min"] = model.addLConstr(soc[-1].item(), GRB.GREATER_EQUAL, variables["p_bat_cap"], name=scalar_name("soc_end_min"))
+            else:
+                constraints["soc_init"] = model.addLConstr(soc[0].item(), GRB.EQUAL, 0, name=scalar_name("soc_init"))
+                constraints["soc_end_min"] = model.addLConstr(soc[-1].item(), GRB.GREATER_EQUAL, 0, name=scalar_name("soc_end_min"))
+            # SOC update between consecutive hours, efficiencies set per scenario
+            constraints["soc_update"] = model.addConstr(
+                soc[1:] == soc[:-1] + p_bat_charge[:-1] - p_bat_discharge[:-1],
+                name=hourly_names("soc_update", T[:-1])
+            )
+
+        self.model = model
+        self._structure = (question, num_hours, self.exclusivity, names, has_battery)
+        self._row_names = row_names
+        # Dual keys in the order a battery model reports them; rows left out without a battery are
+        # reported with a 0.0 dual, so the exported dual files keep the same entries either way
+        if has_battery:
+            self._dual_names = row_names
+        else:
+            limits_end = 2 + 4 * num_hours  # total_load_min/max, then the import/export/pv/p_load limits
+            self._dual_names = (row_names[:2] + [f"soc_lim_{t}" for t in T] + row_names[2:limits_end]
+                                + [f"charge_exclusivity_{t}" for t in T]
+                                + [f"discharge_exclusivity_{t}" for t in T]
+                                + row_names[limits_end:] + ["soc_init", "soc_end_min"]
+                                + [f"soc_update_{t}" for t in T[:-1]])
+        self._mip_start = None
+        self._hourly = hourly
+        self._columns = columns
+        self._variables = variables
+        self._constraints = constraints
+        self._objective = getattr(self, self.OBJECTIVES.get(question, "_discomfort_objective"))
+        self._quad_weight = 0.0  # weight of the p_load @ p_load term currently in the objective
+
+    def _profit_objective(self, linear, reference_profile, battery_price_coeff):
+        """Question 1a: profit minus the small simultaneity penalties, all linear."""
+        self._write_objective(linear)
+
+    def _discomfort_objective(self, linear, reference_profile, battery_price_coeff):
+        """Questions 1b/1c: profit minus the weighted squared deviation from the reference profile, and penalties.
+
+        w * (p_load - ref)^2 is expanded into w * p_load^2 - 2w * ref * p_load + w * ref @ ref.
+        """
+        discomfort_cost_per_kWh = getattr(self.consumer, 'discomfort_cost_per_kWh', 1.0)
+        linear[:, self._columns.index("p_load")] += 2 * discomfort_cost_per_kWh * reference_profile
+        self._write_objective(linear, quad_weight=discomfort_cost_per_kWh,
+                              constant=-discomfort_cost_per_kWh * float(reference_profile @ reference_profile))
+
+    def _battery_sizing_objective(self, linear, reference_profile, battery_price_coeff):
+        """Question 2b: the 1b/1c objective minus the cost of the battery capacity being sized."""
+        self._discomfort_objective(linear, reference_profile, battery_price_coeff)
+        self._variables["p_bat_cap"].Obj = -battery_price_coeff
+
+    def _write_objective(self, linear, quad_weight=0.0, constant=0.0):
+        """Set the maximized objective linear . hourly - quad_weight * p_load @ p_load + constant.
+
+        The linear coefficients and the constant are written as attributes, so a re-solve builds no
+        expression; the quadratic term is replaced with setObjective only when its weight changes
+        (which also clears the linear coefficients, written afterwards).
+        """
+        model = self.model
+        if quad_weight != self._quad_weight:
+            p_load = self._variables["p_load"]
+            model.setObjective(-quad_weight * (p_load @ p_load), GRB.MAXIMIZE)
+            self._quad_weight = quad_weight
+        self._hourly.Obj = linear
+        model.ObjCon = constant
 
     def build_and_solve_standardized(self, debug=False, question="question_1a",num_hours=24,vary_tariff=False,fixed_da=None):
-        """Build and solve the optimization model.
+        """Build (or reuse) and solve the optimization model.
 
         Args:
             debug: If True, print data checks.
@@ -257,35 +564,52 @@ class EnergySystemModel:
 
         Returns:
             (results: dict, objVal: float) on optimal solution, else (None, None).
+            Optimal solves are memoized on their inputs (see _input_key): solving the same data again
+            returns the results without re-optimizing, as a copy the caller is free to modify.
         """
-        T = list(range(num_hours))
-
-        # Create model
-        model = gp.Model("pv_grid_profit_max")
-        model.setParam("OutputFlag", 0) # Suppress Gurobi output, 0 = no output, 1 = output 
-
-        variables = {}
-        VARIABLES = []
-        for t in T:
-            VARIABLES += [f"p_import_{t}", f"p_export_{t}", f"p_load_{t}", f"p_pv_actual_{t}", f"y_{t}", f"z_{t}",
-                          f"p_bat_charge_{t}", f"p_bat_discharge_{t}", f"soc_{t}","p_bat_cap"]
+        # Hourly profiles, read once and shared by the cache key, the model data and the results
+        pv_profile = self.der.get_pv_profile(num_hours)
+        phi_imp = self.grid.get_import_tariff(num_hours)
+        phi_exp = self.grid.get_export_tariff(num_hours)
+        energy_price = self.grid.get_energy_price(num_hours)
+        reference_ratio = self.consumer.get_reference_profile(num_hours)
+
+        cache_key = self._input_key(question, num_hours, vary_tariff, fixed_da,
+                                    (pv_profile, phi_imp, phi_exp, energy_price, reference_ratio))
+        cached = self._result_cache.get(cache_key)
+        if cached is not None and not debug:
+            self._result_cache.move_to_end(cache_key)
+            # Hand out copies so edits by one caller cannot leak into later cache hits
+            self.results, self.results_arrays = _copy_results(cached[0], cached[1])
+            self.total_profit = cached[2]
+            return self.results, self.total_profit
+
+        # Without storage capacity the battery columns and rows are left out (question 2b sizes the battery)
+        has_battery = question == "question_2b" or self.consumer.get_storage_capacity() > 0
+
+        # Reuse the model from an earlier solve when question, horizon, exclusivity mode and battery presence
+        # match; debug runs get a model with Gurobi names
+        if self.model is None or self._structure != (question, num_hours, self.exclusivity, debug, has_battery):
+            self._build(question, num_hours, names=debug, has_battery=has_battery)
+        model = self.model
+        hourly = self._hourly
+        variables = self._variables
+        constraints = self._constraints
+        HOURLY_VARIABLES = self.HOURLY_VARIABLES
 
         # Parameters
-        P_pv     = [self.der.get_max_pv_capacity()* v for v in self.der.get_pv_profile(num_hours)]
-        phi_imp  = self.grid.get_import_tariff(num_hours)
-        phi_exp  = self.grid.get_export_tariff(num_hours)
+        P_pv     = self.der.get_max_pv_capacity() * pv_profile
+
 
-        
         if vary_tariff:
-            np.random.seed(42)
-            scale = np.random.uniform(0.5, 1.5, num_hours)
-            phi_imp = [phi_imp[t]*scale[t] for t in T]
-            phi_exp = [phi_exp[t]*scale[t] for t in T]
+            scale = _tariff_scale(num_hours)
+            phi_imp = phi_imp[:num_hours] * scale
+            phi_exp = phi_exp[:num_hours] * scale
 
         if fixed_da and isinstance(fixed_da,(int,float)):
-            da_price = [fixed_da for _ in range(num_hours)]
+            da_price = np.full(num_hours, float(fixed_da))
         else:
-            da_price = self.grid.get_energy_price(num_hours)
+            da_price = energy_price
 
         P_down   = self.grid.get_max_import()
         P_up     = self.grid.get_max_export()
@@ -295,14 +619,9 @@ class EnergySystemModel:
         P_L_max  = self.consumer.get_max_load_per_hour()
         battery_price_coeff = self.consumer.get_battery_price_coeff()
         if question in ["question_2b"]:
-            variables["p_bat_cap"] = model.addVar(lb=0, name="p_bat_cap")
             P_bat_cap = variables["p_bat_cap"]
         else:
-            variables["p_bat_cap"] = model.addVar(lb=self.consumer.get_storage_capacity(), ub = self.consumer.get_storage_capacity(),name="p_bat_cap")
             P_bat_cap = self.consumer.get_storage_capacity()
-            # Strictly speaking this is not a variable, but a parameter. 
-            # However, defining it as a variable allows easy extension to optimization of battery size in question 2b
-            variables["p_bat_cap"] = P_bat_cap
 
         P_bat_ch_max = self.consumer.get_max_charging_power()*P_bat_cap
         P_bat_dis_max = self.consumer.get_max_discharging_power()*P_bat_cap
@@ -313,6 +632,12 @@ class EnergySystemModel:
         P_min    = self.consumer.get_minimum_energy_requirement()*P_L_max
         P_max    = self.consumer.get_maximum_energy_requirement()*P_L_max
 
+        # Hourly parameters over the model horizon for the matrix formulation below
+        P_pv_arr     = P_pv[:num_hours]
+        phi_imp_arr  = phi_imp[:num_hours]
+        phi_exp_arr  = phi_exp[:num_hours]
+        da_price_arr = da_price[:num_hours]
+
         if debug:
             print("=== DATA CHECK ===")
             print("Hours:", num_hours)
@@ -323,208 +648,156 @@ class EnergySystemModel:
         # -----------------------------
         # Standardized formulation
         # -----------------------------
-        
-        objective_coeff = {}
+        p_bat_charge, p_bat_discharge = variables.get("p_bat_charge"), variables.get("p_bat_discharge")
 
-        # Define variable names
-        
-
-        # Add variables with bounds
-        
-        for t in T:
-            variables[f"p_import_{t}"]    = model.addVar(lb=0, name=f"p_import_{t}")
-            variables[f"p_export_{t}"]    = model.addVar(lb=0,  name=f"p_export_{t}")
-            variables[f"p_load_{t}"]      = model.addVar(lb=0, name=f"p_load_{t}")
-            variables[f"p_pv_actual_{t}"] = model.addVar(lb=0,  name=f"p_pv_actual_{t}")
-            # Exclusivity variables as continuous in [0,1]
-            variables[f"y_{t}"]           = model.addVar(lb=0, ub=1, vtype=GRB.CONTINUOUS, name=f"y_{t}")
-            variables[f"z_{t}"]           = model.addVar(lb=0, ub=1, vtype=GRB.CONTINUOUS, name=f"z_{t}")
-            # Battery variables
-            variables[f"p_bat_charge_{t}"]    = model.addVar(lb=0, name=f"p_bat_charge_{t}")
-            variables[f"p_bat_discharge_{t}"] = model.addVar(lb=0, name=f"p_bat_discharge_{t}")
-            variables[f"soc_{t}"]             = model.addVar(lb=0,     name=f"soc_{t}")
-
-
-
-        # Objective
+        # Objective: linear coefficients per hourly column
         epsilon = 1e-3  # Small penalty for simultaneous charge/discharge or import/export
-        if question == "question_1a":
-            # Maximize profit, penalize simultaneous charge/discharge and import/export
-            for t in T:
-                objective_coeff[f"p_export_{t}"] = (da_price[t] - phi_exp[t])
-                objective_coeff[f"p_import_{t}"] = -(da_price[t] + phi_imp[t])
-            objective_ = quicksum(objective_coeff.get(v, 0) * variables[v] for v in VARIABLES)
-            penalty_battery = epsilon * quicksum(variables[f"p_bat_charge_{t}"] + variables[f"p_bat_discharge_{t}"] for t in T)
-            penalty_grid = epsilon * quicksum(variables[f"p_import_{t}"] + variables[f"p_export_{t}"] for t in T)
-            objective = objective_ - penalty_battery - penalty_grid
-
-        else: # question == "question_1b" or question == "question_1c":
-            # Maximize profit minus discomfort, penalize simultaneous charge/discharge and import/export
-            reference_profile = [v*P_L_max for v in self.consumer.get_reference_profile(num_hours)]  # scaled reference profile
-            discomfort_cost_per_kWh = getattr(self.consumer, 'discomfort_cost_per_kWh', 1.0)
-
-            # Profit = export revenue - import cost
-            profit_terms = quicksum(
-                (da_price[t] - phi_exp[t]) * variables[f"p_export_{t}"]
-                - (da_price[t] + phi_imp[t]) * variables[f"p_import_{t}"]
-                for t in T
-            )
-
-            # Discomfort: deviation from reference profile
-            discomfort_terms = quicksum(
-                (variables[f"p_load_{t}"] - reference_profile[t])**2
-                for t in T
-            )
-
-            # Small penalties to discourage simultaneous battery charge/discharge or import/export
-            penalty_battery = epsilon * quicksum(variables[f"p_bat_charge_{t}"] + variables[f"p_bat_discharge_{t}"] for t in T)
-            penalty_grid = epsilon * quicksum(variables[f"p_import_{t}"] + variables[f"p_export_{t}"] for t in T)
-
-            # Final objective: maximize profit minus discomfort and penalties
-            objective = (
-                profit_terms
-                - discomfort_cost_per_kWh * discomfort_terms
-                - penalty_battery
-                - penalty_grid
-            )
-
-            if question == "question_2b":
-                objective -= variables["p_bat_cap"]*battery_price_coeff
-
-        model.setObjective(objective, GRB.MAXIMIZE)
+        column = self._columns.index
+        linear = np.zeros(hourly.shape)
+        # Profit = export revenue - import cost, less the small penalties that discourage simultaneous
+        # import/export and battery charge/discharge
+        linear[:, column("p_export")] = da_price_arr - phi_exp_arr - epsilon
+        linear[:, column("p_import")] = -(da_price_arr + phi_imp_arr) - epsilon
+        if has_battery:
+            linear[:, column("p_bat_charge")] = -epsilon
+            linear[:, column("p_bat_discharge")] = -epsilon
+        # Scaled reference profile for the discomfort term (question 1a has none)
+        reference_profile_arr = None
+        if question != "question_1a":
+            reference_profile = reference_ratio * P_L_max
+            reference_profile_arr = reference_profile[:num_hours]
+
+        # Question-specific terms, via the builder selected in _build (see OBJECTIVES); the objective is
+        # written as coefficients (see _write_objective), never extended via getObjective()
+        self._objective(linear, reference_profile_arr, battery_price_coeff)
 
         # -----------------------------
-        # Constraints
+        # Constraints: write this scenario's data into the prebuilt rows
         # -----------------------------
-        constraints = []
-
         # Energy requirement bounds
-        constraints.append(
-            model.addLConstr(quicksum(variables[f"p_load_{t}"] for t in T), GRB.GREATER_EQUAL, P_min, name="total_load_min")
-        )
-        constraints.append(
-            model.addLConstr(quicksum(variables[f"p_load_{t}"] for t in T), GRB.LESS_EQUAL, P_max, name="total_load_max")
-        )
-
-
-        # Hourly balance + import/export exclusivity
-        for t in T:
-            # SOC limits
-            constraints.append(model.addLConstr(variables[f"soc_{t}"], GRB.LESS_EQUAL, variables["p_bat_cap"],name=f"soc_lim_{t}"))
-
-            # limits
-            constraints.append(model.addLConstr(variables[f"p_import_{t}"], GRB.LESS_EQUAL, P_down, name=f"import_lim_{t}"))
-            constraints.append(model.addLConstr(variables[f"p_export_{t}"], GRB.LESS_EQUAL, P_up, name=f"export_lim_{t}"))
-            constraints.append(model.addLConstr(variables[f"p_pv_actual_{t}"], GRB.LESS_EQUAL, P_pv[t], name=f"pv_lim_{t}"))
-            constraints.append(model.addLConstr(variables[f"p_load_{t}"], GRB.LESS_EQUAL, P_L_max, name=f"p_load_lim_{t}"))
-
-            if  question in ["question_2b"]:
-                # If battery capacity is a variable (question 2b), we need to use big M method in another fasion
-                # Where we don't multiply two variables
-                big_m = 1e3  # A sufficiently large number
-
-                # Exclusivity (big-M with z_t)
-                constraints.append(model.addLConstr(variables[f"p_bat_charge_{t}"], GRB.LESS_EQUAL, big_m * variables[f"z_{t}"], name=f"charge_excl_{t}"))
-                constraints.append(model.addLConstr(variables[f"p_bat_discharge_{t}"], GRB.LESS_EQUAL, big_m * (1 - variables[f"z_{t}"]), name=f"discharge_excl_{t}"))
-
-            else: # question 1a, 1b, 1c
-                # Battery exclusivity (Big-M logic) - use separate big-M for charge/discharge with continuous z_t
-                # Here we can use the actual max power since p_bat_cap is fixed and not a variable
-                constraints.append(model.addLConstr(variables[f"p_bat_charge_{t}"], GRB.LESS_EQUAL, P_bat_ch_max * variables[f"z_{t}"],name=f"charge_exclusivity_{t}"))
-                constraints.append(model.addLConstr(variables[f"p_bat_discharge_{t}"], GRB.LESS_EQUAL, P_bat_dis_max * (1 - variables[f"z_{t}"]),name=f"discharge_exclusivity_{t}"))
-
-
-            # Hourly balance. 
-            constraints.append(
-                model.addLConstr(
-                    variables[f"p_import_{t}"]
-                    + variables[f"p_pv_actual_{t}"]
-                    + variables[f"p_bat_discharge_{t}"],          # battery delivers this much to the bus
-                    GRB.EQUAL,
-                    variables[f"p_load_{t}"]
-                    + variables[f"p_export_{t}"]
-                    + variables[f"p_bat_charge_{t}"],              # this amount goes into battery (before storage losses)
-                    name=f"balance_{t}"
-                )
-            )
+        constraints["total_load_min"].RHS = P_min
+        constraints["total_load_max"].RHS = P_max
+
+        # limits
+        constraints["import_lim"].RHS = P_down
+        constraints["export_lim"].RHS = P_up
+        constraints["pv_lim"].RHS = P_pv_arr
+        constraints["p_load_lim"].RHS = P_L_max
+
+        if has_battery:
+            initial_soc = self.consumer.get_initial_soc()
+            final_soc = self.consumer.get_final_soc()
+            if question in ["question_2b"]:
+                # SOC targets are shares of the p_bat_cap variable
+                model.chgCoeff(constraints["soc_init"], variables["p_bat_cap"], -initial_soc)
+                model.chgCoeff(constraints["soc_end_min"], variables["p_bat_cap"], -final_soc)
+            else:
+                constraints["soc_lim"].RHS = P_bat_cap
+                constraints["soc_init"].RHS = initial_soc*P_bat_cap
+                constraints["soc_end_min"].RHS = final_soc*P_bat_cap
+                if self.exclusivity == "big_m":
+                    # Exclusivity: p_bat_charge <= P_bat_ch_max*z, p_bat_discharge + P_bat_dis_max*z <= P_bat_dis_max
+                    constraints["discharge_excl"].RHS = P_bat_dis_max
+                    z_vars = variables["z"].tolist()
+                    for c, z_t in zip(constraints["charge_excl"].tolist(), z_vars):
+                        model.chgCoeff(c, z_t, -P_bat_ch_max)
+                    for c, z_t in zip(constraints["discharge_excl"].tolist(), z_vars):
+                        model.chgCoeff(c, z_t, P_bat_dis_max)
+                else:
+                    # SOS1 sets carry no power limits, so apply them as bounds
+                    p_bat_charge.UB = P_bat_ch_max
+                    p_bat_discharge.UB = P_bat_dis_max
 
-            # Constrain SOC for all houes except the last one where SOC bust be over final_soc (see above)
-            # Here we include efficiency!
-            if t == T[0]:
-                # Initial SOC constraint
-                initial_soc = self.consumer.get_initial_soc()
-                constraints.append(
-                    model.addLConstr(variables[f"soc_{t}"], GRB.EQUAL, initial_soc*variables["p_bat_cap"], name="soc_init")
-                )
-            if t == T[-1]:
-                final_soc = self.consumer.get_final_soc()
-                constraints.append(
-                    model.addLConstr(variables[f"soc_{t}"], GRB.GREATER_EQUAL, final_soc*variables["p_bat_cap"], name="soc_end_min")
-                )
-            if t != T[-1]:
-                constraints.append(
-                    model.addLConstr(
-                        variables[f"soc_{t+1}"],
-                        GRB.EQUAL,
-                        variables[f"soc_{t}"]
-                        + P_bat_ch_eff * variables[f"p_bat_charge_{t}"]     # energy stored = charge power * eff_ch
-                        - (1.0 / P_bat_dis_eff) * variables[f"p_bat_discharge_{t}"],  # soc reduces by delivered / eff_dis
-                        name=f"soc_update_{t}"
-                    )
-                )
-                
+            # SOC update with efficiencies: soc_{t+1} = soc_t + eff_ch*charge_t - discharge_t/eff_dis
+            charge_vars = p_bat_charge.tolist()
+            discharge_vars = p_bat_discharge.tolist()
+            for t, c in enumerate(constraints["soc_update"].tolist()):
+                model.chgCoeff(c, charge_vars[t], -P_bat_ch_eff)      # energy stored = charge power * eff_ch
+                model.chgCoeff(c, discharge_vars[t], 1.0 / P_bat_dis_eff)  # soc reduces by delivered / eff_dis
 
         # -----------------------------
         # Solve
         # -----------------------------
+        # LP/QP solves (big_m) start cold: their optimum is often dual degenerate, and a warm start from the
+        # previous scenario's basis would make the exported duals depend on scenario order and worker count
+        if self.exclusivity != "sos1":
+            model.reset()
+        elif self._mip_start is not None:
+            # In sos1 mode the previous scenario's solution is the MIP start; Gurobi repairs or drops it
+            # when the new data makes it infeasible
+            hourly.Start = self._mip_start
+
+        # No explicit model.update(): the pending RHS/bound/coefficient writes above are flushed once by optimize()
         model.optimize()
 
-        if model.status == GRB.OPTIMAL:
-            # Primal values: only Gurobi variables get .X, others (like p_bat_cap) are added directly
-            results = {}
-            for v in VARIABLES:
-                if hasattr(variables[v], 'X'):
-                    results[v] = variables[v].X
-                else:
-                    results[v] = variables[v]
-            # Add non-Gurobi parameters explicitly if needed
-            if question != "question_2b":
-                results['p_bat_cap'] = P_bat_cap
-            # Dual values
+        # A MIP stopped early by a limit set through params (e.g. TimeLimit) still reports its incumbent
+        if model.status == GRB.OPTIMAL or (model.IsMIP and model.SolCount > 0):
+            # Primal values: one call for all hourly variables; ndarray columns, plus lists in results
+            hourly_X = hourly.X
+            if model.IsMIP:
+                self._mip_start = hourly_X
+            # Battery columns left out of a no-battery model are reported as zeros
+            results_arrays = {v: hourly_X[:, self._columns.index(v)] if v in self._columns else np.zeros(num_hours)
+                              for v in HOURLY_VARIABLES}
+            results = {v: arr.tolist() for v, arr in results_arrays.items()}
+            # p_bat_cap is a Gurobi variable in question 2b, otherwise a parameter
+            results['p_bat_cap'] = variables["p_bat_cap"].X if question == "question_2b" else P_bat_cap
+            # Dual values keyed by the row names recorded in _build, fetched in one batched call; a MIP has none.
+            # Battery rows absent from a no-battery model keep their 0.0 entry
             duals = {}
-            for c in model.getConstrs():
-               # Use constraint name if available, else Gurobi's default name
-               cname = c.ConstrName if c.ConstrName else str(c)
-               duals[cname] = c.Pi
+            if not model.IsMIP:
+                duals = dict.fromkeys(self._dual_names, 0.0)
+                duals.update(zip(self._row_names, model.getAttr("Pi", model.getConstrs())))
             # Add curtailment for each hour to results
-            results['p_curtailment'] = [P_pv[t] - results[f'p_pv_actual_{t}'] for t in T]
-            # Handle p_bat_cap as either a Gurobi variable or a number
-            p_bat_cap_val = results["p_bat_cap"].X if hasattr(results["p_bat_cap"], "X") else results["p_bat_cap"]
-            results["soc_normal"] = [results[f"soc_{t}"]/p_bat_cap_val if p_bat_cap_val > 0 else 0 for t in T]
+            results['p_curtailment'] = (P_pv_arr - results_arrays["p_pv_actual"]).tolist()
+            p_bat_cap_val = results["p_bat_cap"]
+            results["soc_normal"] = (results_arrays["soc"] / p_bat_cap_val).tolist() if p_bat_cap_val > 0 else [0] * num_hours
             results["battery_price_coeff"] = battery_price_coeff
             # Store duals in results for access, but keep return signature unchanged
             results['duals'] = duals
-            results['phi_imp'] = phi_imp
-            results['phi_exp'] = phi_exp
-            results['da_price'] = da_price
+            # Hourly series are returned as lists, as the plotting/printing code expects
+            results['phi_imp'] = phi_imp.tolist()
+            results['phi_exp'] = phi_exp.tolist()
+            results['da_price'] = da_price.tolist()
             # Add reference profile if not 1a
             if not question == "question_1a":
-                results['reference_profile'] = reference_profile
+                results['reference_profile'] = reference_profile.tolist()
             # For 1b/1c, also return true cost/profit and discomfort
             if question in ["question_1b", "question_1c"]:
                 # Recompute cost and discomfort terms using the solution
-                discomfort = sum((results[f"p_load_{t}"] - reference_profile[t]) ** 2 for t in T)
+                discomfort = float(np.sum((results_arrays["p_load"] - reference_profile_arr) ** 2))
                 results['discomfort'] = discomfort
                 # Compute actual profit as in 1a (export revenue - import cost)
-                actual_profit = sum((da_price[t] - phi_exp[t]) * results[f"p_export_{t}"] - (da_price[t] + phi_imp[t]) * results[f"p_import_{t}"] for t in T)
+                actual_profit = float((da_price_arr - phi_exp_arr) @ results_arrays["p_export"] - (da_price_arr + phi_imp_arr) @ results_arrays["p_import"])
                 results['actual_profit'] = actual_profit
             else:
                 # For 1a, actual profit is the objective value
                 results['actual_profit'] = model.objVal
             self.results = results
+            self.results_arrays = results_arrays
             self.total_profit = model.objVal
+            if model.status == GRB.OPTIMAL:
+                self._result_cache[cache_key] = (*_copy_results(results, results_arrays), model.objVal)
+                if len(self._result_cache) > self.RESULT_CACHE_SIZE:
+                    self._result_cache.popitem(last=False)
             return results, model.objVal
         else:
             self.results = None
+            self.results_arrays = None
             self.total_profit = None
-            return None, None
\ No newline at end of file
+            return None, None
+
+
+# Per-process model used by _solve_one, so a pool worker reuses it across the problems it gets
+_worker_model = None
+
+def _solve_one(problem, options):
+    """Process-pool entry point for EnergySystemModel.solve_many (module level so it can be pickled)."""
+    global _worker_model
+    model_kwargs, solve_kwargs = options
+    consumer, der, grid = problem
+    if _worker_model is None:
+        _worker_model = EnergySystemModel(consumer, der, grid, **model_kwargs)
+    else:
+        _worker_model.consumer, _worker_model.der, _worker_model.grid = consumer, der, grid
+    return _worker_model.build_and_solve_standardized(**solve_kwargs)
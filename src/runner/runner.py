@@ -1,8 +1,12 @@
 """Scenario orchestration and plotting runner."""
 
+import os
 from pathlib import Path
 from typing import Dict, List
-from data_ops.data_visualizer import DataVisualizer
+
+from data_ops.data_loader import DataLoader
+from opt_model.opt_model import Consumer, DER, Grid, EnergySystemModel
+from utils.utils import load_json
 
 class Runner:
     """Coordinates simulations across scenarios and plotting.
@@ -18,62 +22,60 @@ class Runner:
         """Convert flat keys into list series.
 
         Converts results like {'p_import_0': 1.0, 'p_import_1': 2.0}
-        into {'p_import': [1.0, 2.0]}. Non-indexed keys are kept as-is.
+        into {'p_import': [1.0, 2.0]}. Non-indexed keys are kept as-is, so results
+        that are already grouped (as EnergySystemModel returns them) are just copied.
+        Values are placed at their index (missing indices stay None), so no sort is needed.
         """
-        from collections import defaultdict
-        import re
-        grouped = defaultdict(list)
-        pattern = re.compile(r"(.+)_([0-9]+)$")
-        for k, v in results.items():
-            m = pattern.match(k)
-            if m:
-                base, idx = m.group(1), int(m.group(2))
-                grouped[base].append((idx, v))
-            else:
-                grouped[k] = v
-        # Sort by index and convert to lists
         out = {}
-        for base, values in grouped.items():
-            if isinstance(values, list) and values and isinstance(values[0], tuple):
-                values.sort(key=lambda x: x[0])
-                out[base] = [v for _, v in values]
+        series = {}
+        for k, v in results.items():
+            base, _, idx = k.rpartition("_")
+            if base and idx.isdigit():
+                values = series.get(base)
+                if values is None:
+                    values = series[base] = out[base] = []
+                i = int(idx)
+                if i >= len(values):
+                    values.extend([None] * (i + 1 - len(values)))
+                values[i] = v
             else:
-                out[base] = values
+                out[k] = v
         return out
 
-    def __init__(self,show_plots=False,save_plots=False,question=None,num_hours=24,vary_tariff=False,fixed_da=None) -> None:
-        """Initialize the Runner with execution flags and context."""
+    def __init__(self,show_plots=False,save_plots=False,question=None,num_hours=24,vary_tariff=False,fixed_da=None,max_workers=1,threads=None,exclusivity="big_m",params=None) -> None:
+        """Initialize the Runner with execution flags and context.
+
+        max_workers sizes the process pool used by run_all_simulations (1 = solve in this
+        process, None = CPU count); threads, exclusivity and params (extra Gurobi parameters)
+        are passed on to EnergySystemModel.
+        """
         self.show_plots = show_plots
         self.save_plots = save_plots
         self.question = question
         self.num_hours = num_hours # default, will be updated in run_single_simulation
         self.vary_tariff = vary_tariff
         self.fixed_da = fixed_da
-
-    def run_single_simulation(self, question, input_path, scaling_path):
-        """Run a single simulation for a given scaling file.
-
-        Args:
-            question: Assignment question id (e.g., 'question_1a').
-            input_path: Path to the question's data directory.
-            scaling_path: Path to the scenario scaling JSON.
-
-        Returns:
-            Tuple (results: dict, profit: float) where results include
-            time series and metadata needed for plotting and reporting.
-        """
-        import json
-        from data_ops.data_loader import DataLoader
-        from opt_model.opt_model import Consumer, DER, Grid, EnergySystemModel
-
-        dataloader = DataLoader(question=question, input_path=input_path)
+        self.max_workers = max_workers
+        self.threads = threads
+        self.exclusivity = exclusivity
+        self.params = params
+        self._model = None # EnergySystemModel reused across scenarios (only its data changes)
+        self._dataloaders = {} # (question, input_path) -> DataLoader shared by that question's scenarios
+
+    def _load_problem(self, question, input_path, scaling_path):
+        """Load the inputs for one scenario and return its (consumer, der, grid)."""
+        # The input files are the same for every scenario of a question; only the scaling file differs
+        key = (question, str(input_path))
+        dataloader = self._dataloaders.get(key)
+        if dataloader is None:
+            dataloader = self._dataloaders[key] = DataLoader(question=question, input_path=input_path)
         der_production = getattr(dataloader, 'DER_production', None)
         bus_params = getattr(dataloader, 'bus_params', None)
         appliance_params = getattr(dataloader, 'appliance_params', None)
         usage_preference = getattr(dataloader, 'usage_preference', None)
 
-        with open(scaling_path) as f:
-            scaling = json.load(f)
+        # Scaling files are parsed once per path and shared across runs
+        scaling = load_json(str(scaling_path))
 
         consumer = Consumer(
             usage_preference,
@@ -93,7 +95,28 @@ class Runner:
             bus_params,
             scale=scaling
         )
-        model = EnergySystemModel(consumer, der, grid)
+        return consumer, der, grid
+
+    def run_single_simulation(self, question, input_path, scaling_path):
+        """Run a single simulation for a given scaling file.
+
+        Args:
+            question: Assignment question id (e.g., 'question_1a').
+            input_path: Path to the question's data directory.
+            scaling_path: Path to the scenario scaling JSON.
+
+        Returns:
+            Tuple (results: dict, profit: float) where results include
+            time series and metadata needed for plotting and reporting.
+        """
+        consumer, der, grid = self._load_problem(question, input_path, scaling_path)
+        if self._model is None:
+            self._model = EnergySystemModel(consumer, der, grid, threads=self.threads, exclusivity=self.exclusivity,
+                                            params=self.params)
+        else:
+            # Same model structure for every scenario: swap in the new data and re-solve
+            self._model.consumer, self._model.der, self._model.grid = consumer, der, grid
+        model = self._model
         results, profit = model.build_and_solve_standardized(debug=False,question=self.question,num_hours=self.num_hours,vary_tariff=self.vary_tariff,fixed_da=self.fixed_da)
     # Only add scenario and plot in run_all_simulations, not here
         return results, profit
@@ -109,16 +132,26 @@ class Runner:
         Returns:
             Dict mapping scenario_name -> {'results': dict, 'profit': float}.
         """
-        visualizer = DataVisualizer(question=self.question)
+        # The visualizer (and its pandas/matplotlib imports) is only needed when plots are shown or saved
+        visualizer = None
+        if self.show_plots or self.save_plots:
+            from data_ops.data_visualizer import DataVisualizer
+            visualizer = DataVisualizer(question=self.question)
         scenario_results = {}
-        for scenario_name, scaling_path in scenario_files.items():
-            results, profit = self.run_single_simulation(question, input_path, scaling_path)
+        workers = min(len(scenario_files), self.max_workers or os.cpu_count() or 1)
+        if workers > 1:
+            outcomes = self._run_parallel(question, input_path, scenario_files, workers)
+        else:
+            outcomes = (self.run_single_simulation(question, input_path, scaling_path)
+                        for scaling_path in scenario_files.values())
+        for scenario_name, (results, profit) in zip(scenario_files, outcomes):
             results_listed = self._results_flat_to_lists(results)
             scenario_results[scenario_name] = {'results': results_listed, 'profit': profit}
-            visualizer.add_scenario(scenario_name, results_listed, label=scenario_name)
+            if visualizer is not None:
+                visualizer.add_scenario(scenario_name, results_listed, label=scenario_name)
             print(f"Scenario: {scenario_name}, Profit: {profit}")
         # Plot comparison
-        if self.show_plots or self.save_plots:
+        if visualizer is not None:
             visualizer.plot_comparison(keys=["p_import", "p_export", "p_load", "p_pv_actual",'curtailment','P_pv',"p_bat_charge","p_bat_discharge","soc_normal","p_curtailment"],
                                        show_plots = self.show_plots,
                                        save_plots=self.save_plots,
@@ -131,3 +164,19 @@ class Runner:
                 
         return scenario_results
 
+    def _run_parallel(self, question, input_path, scenario_files, workers):
+        """Solve the scenarios in a process pool; yields (results, profit) in scenario order.
+
+        Inputs are loaded here and the solves are handed to EnergySystemModel.solve_many.
+        """
+        problems = [self._load_problem(question, input_path, scaling_path)
+                    for scaling_path in scenario_files.values()]
+        yield from EnergySystemModel.solve_many(
+            problems,
+            max_workers=workers,
+            model_kwargs=dict(exclusivity=self.exclusivity, params=self.params),
+            question=self.question,
+            num_hours=self.num_hours,
+            vary_tariff=self.vary_tariff,
+            fixed_da=self.fixed_da)
+
@@ -1 +1 @@
-from .utils import load_dataset
\ No newline at end of file
+from .utils import load_file, load_json
\ No newline at end of file
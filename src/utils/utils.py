@@ -1,6 +1,24 @@
 """Utility helpers for scenario selection, printing, and IO."""
 
+import json
 import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from types import MappingProxyType
+
+import numpy as np
+import pandas as pd
+
+# Optional compiled parsers; the stdlib/pandas readers are used when missing
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    from pyarrow import csv as pa_csv
+except ImportError:
+    pa_csv = None
 
 # Utility: get a unique filename by appending a number if needed
 def get_unique_filename(base_name):
@@ -18,15 +36,29 @@ def get_unique_filename(base_name):
         i += 1
     return candidate
 
+def _objective_lines(results, profit):
+    """Closing lines shared by the full and compact scenario printouts."""
+    if profit is None:
+        return ["Model did not find an optimal solution.", "============================\n"]
+    lines = [f"Objective Value: {profit:.2f}"]
+    if "true_cost" in results or "discomfort" in results:
+        lines.append("(Objective value is a weighted sum of cost and discomfort, not pure profit)")
+    else:
+        lines.append("(Objective value is total profit)")
+    lines.append("============================\n")
+    return lines
+
 # Print results and profit for a single scenario
 def print_results(results, profit, scenario_name=None):
     """Pretty-print full results for one scenario.
 
     Includes objective value and actual profit (if present), selected
     timeseries keys, and optional true_cost/discomfort if available.
+    The lines are collected and written with a single print call.
     """
+    lines = []
     if "actual_profit" in results:
-        print(f"Actual Profit: {results['actual_profit']:.2f} DKK")
+        lines.append(f"Actual Profit: {results['actual_profit']:.2f} DKK")
     if results is None:
         print(f"No results available for scenario '{scenario_name}'.")
         return
@@ -34,30 +66,24 @@ def print_results(results, profit, scenario_name=None):
     if scenario_name:
         title += f" ({scenario_name})"
     title += " ==="
-    print(f"\n{title}")
+    lines.append(f"\n{title}")
     for key, values in results.items():
         if key not in ["duals", "reference_profile", "true_cost", "discomfort"]:
-            print(f"{key}: {values}")
+            lines.append(f"{key}: {values}")
     # Print true cost/discomfort if present
     if "true_cost" in results:
-        print(f"True Cost (import/export only): {results['true_cost']:.2f} DKK")
+        lines.append(f"True Cost (import/export only): {results['true_cost']:.2f} DKK")
     if "discomfort" in results:
-        print(f"Discomfort term: {results['discomfort']:.2f}")
-    if profit is not None:
-        print(f"Objective Value: {profit:.2f}")
-        if "true_cost" in results or "discomfort" in results:
-            print("(Objective value is a weighted sum of cost and discomfort, not pure profit)")
-        else:
-            print("(Objective value is total profit)")
-    else:
-        print("Model did not find an optimal solution.")
-    print("============================\n")
+        lines.append(f"Discomfort term: {results['discomfort']:.2f}")
+    lines.extend(_objective_lines(results, profit))
+    print("\n".join(lines))
 
 # Print results and profit for a single scenario (small version)
 def print_results_small(results, profit, scenario_name=None):
-    """Print a compact summary for one scenario (selected sums only)."""
+    """Print a compact summary for one scenario (selected sums only, one print call)."""
+    lines = []
     if "actual_profit" in results:
-        print(f"Actual Profit: {results['actual_profit']:.2f} DKK")
+        lines.append(f"Actual Profit: {results['actual_profit']:.2f} DKK")
     if results is None:
         print(f"No results available for scenario '{scenario_name}'.")
         return
@@ -65,90 +91,105 @@ def print_results_small(results, profit, scenario_name=None):
     if scenario_name:
         title += f" ({scenario_name})"
     title += " ==="
-    print(f"\n{title}")
+    lines.append(f"\n{title}")
     # Only print key summary values
     for key in ["p_import", "p_export", "p_load", "curtailment"]:
         if key in results:
-            print(f"{key} (sum): {sum(results[key]):.2f}")
-    if profit is not None:
-        print(f"Objective Value: {profit:.2f}")
-        if "true_cost" in results or "discomfort" in results:
-            print("(Objective value is a weighted sum of cost and discomfort, not pure profit)")
-        else:
-            print("(Objective value is total profit)")
-    else:
-        print("Model did not find an optimal solution.")
-    print("============================\n")
+            lines.append(f"{key} (sum): {float(np.asarray(results[key], dtype=np.float64).sum()):.2f}")
+    lines.extend(_objective_lines(results, profit))
+    print("\n".join(lines))
+
+def _write_duals(filename, name, duals):
+    """Write one scenario's dual values to filename (formatted in one pass, single write call)."""
+    lines = [f"Dual values (shadow prices) for scenario: {name}"]
+    lines.extend(f"{cname}: {dual:.6f}" for cname, dual in duals.items())
+    with open(filename, 'w') as f:
+        f.write("\n".join(lines) + "\n")
 
 # Print results and profit for all scenarios
 def print_all_scenarios(scenario_results, mode="large",question=None,vary_tariff=False,fixed_da=None):
     """Print results for all scenarios and export duals to txt files.
 
+    The txt/<question> directory is created if needed. The dual files are written by a
+    background thread while the next scenarios are printed; all writes have finished
+    (and any write error is raised) on return.
+
     Args:
         scenario_results: Mapping of scenario -> {'results': dict, 'profit': float}
         mode: 'large' or 'small' print format
         question: Question id used to build duals output path
         vary_tariff: If True, append suffix to duals filename
         fixed_da: If set, append DA suffix to duals filename
+
+    Returns:
+        List of the dual files written (empty when no scenario has duals, e.g. sos1 runs).
     """
     print("\n=== Scenario Results ===")
-    for name, result in scenario_results.items():
-        print(f"\nScenario: {name}")
-        if mode == "small":
-            print_results_small(result['results'], result['profit'], name)
-        else:
-            print_results(result['results'], result['profit'], name)
-        # Print duals if available
-        duals = result['results'].get('duals', None)
-        if duals:
-            # Export duals to a .txt file per scenario
-            filename = f"txt/{question}/duals_{name.replace(' ', '_')}.txt"
-            if vary_tariff:
-                # add suffix to filename
-                filename = filename.replace(".txt", "_varytariff.txt")
-            if fixed_da is not None:
-                filename = filename.replace(".txt", f"_fixedDA{fixed_da}.txt")
-            with open(filename, 'w') as f:
-                f.write(f"Dual values (shadow prices) for scenario: {name}\n")
-                for cname, dual in duals.items():
-                    f.write(f"{cname}: {dual:.6f}\n")
-            print(f"  Dual values exported to {filename}")
-"placeholder for various utils functions"
+    # Create the duals directory once up front (only if there is anything to export)
+    if any(result['results'].get('duals') for result in scenario_results.values()):
+        os.makedirs(f"txt/{question}", exist_ok=True)
+    writes = []
+    exported = []
+    with ThreadPoolExecutor(max_workers=2) as writer:
+        for name, result in scenario_results.items():
+            print(f"\nScenario: {name}")
+            if mode == "small":
+                print_results_small(result['results'], result['profit'], name)
+            else:
+                print_results(result['results'], result['profit'], name)
+            # Print duals if available
+            duals = result['results'].get('duals', None)
+            if duals:
+                # Export duals to a .txt file per scenario
+                filename = f"txt/{question}/duals_{name.replace(' ', '_')}.txt"
+                if vary_tariff:
+                    # add suffix to filename
+                    filename = filename.replace(".txt", "_varytariff.txt")
+                if fixed_da is not None:
+                    filename = filename.replace(".txt", f"_fixedDA{fixed_da}.txt")
+                writes.append(writer.submit(_write_duals, filename, name, duals))
+                exported.append(filename)
+                print(f"  Dual values exported to {filename}")
+    for write in writes:
+        write.result()
+    return exported
 
-import json
-import csv
-import pandas as pd
-from pathlib import Path
+@lru_cache(maxsize=None)
+def _load_json_cached(path_str, mtime_ns):
+    """Parse a JSON file (orjson if installed); cached per (path, modification time)."""
+    path = Path(path_str)
+    if orjson is not None:
+        return orjson.loads(path.read_bytes())
+    return json.loads(path.read_text())
 
-# example function to load data from a specified directory
-def load_dataset(question_name):
-    """Load all files under data/<question_name> into a dict.
+def load_json(path_str):
+    """Parse a JSON file once per path (orjson if installed); later calls return the cached object.
 
-    JSON is parsed, CSV is loaded via DictReader, others are read as text.
-    Keys are file stems; values are parsed content.
+    The file is re-parsed if its modification time changes. The parsed object is
+    shared between callers and must not be modified.
     """
-    base_path = Path("data") / question_name
-    result = {}
- 
-    for file_path in base_path.glob("*"):
-        stem = file_path.stem
-        suffix = file_path.suffix.lower()
- 
-        try:
-            if suffix == '.json':
-                with open(file_path, 'r') as f:
-                    result[stem] = json.load(f)
-            elif suffix == '.csv':
-                with open(file_path, 'r') as f:
-                    result[stem] = list(csv.DictReader(f))
-            else:
-                with open(file_path, 'r') as f:
-                    result[stem] = f.read()
-        except Exception as e:
-            print(f"Error loading {file_path}: {e}")
- 
-    return result
+    return _load_json_cached(path_str, os.stat(path_str).st_mtime_ns)
+
+def _load_csv(path):
+    """Load a CSV file into a DataFrame (pyarrow engine if installed)."""
+    if pa_csv is not None:
+        return pa_csv.read_csv(path).to_pandas(types_mapper=pd.ArrowDtype)
+    return pd.read_csv(path)
+
+# Parser per (lower-case) file suffix; anything else is read as text
+_FILE_LOADERS = {
+    '.json': lambda path: load_json(str(path)),
+    '.csv': _load_csv,
+}
 
+def load_file(file_path):
+    """Parse a single data file.
+
+    JSON is parsed (orjson if installed), CSV is loaded into a DataFrame
+    (pyarrow engine if installed), others are read as text.
+    """
+    path = Path(file_path)
+    return _FILE_LOADERS.get(path.suffix.lower(), Path.read_text)(path)
 
 def select_scenarios(d, keys):
     """Select scenarios by key(s) from a mapping.
@@ -160,21 +201,16 @@ def select_scenarios(d, keys):
         return d
     if isinstance(keys, str):
         keys = [keys]
-    # Create a mapping from lowercase keys to original keys
+    # Map lowercase keys to original keys once, then resolve the requested names through it
     lower_map = {k.lower(): k for k in d}
-    selected = {}
-    for key in keys:
-        k_lower = key.lower()
-        if k_lower in lower_map:
-            selected[lower_map[k_lower]] = d[lower_map[k_lower]]
-    return selected
+    matched = (lower_map.get(key.lower()) for key in keys)
+    return {k: d[k] for k in matched if k is not None}
 
 def get_all_scenarios(question):
-    """Load and return all scenario names from the scenarios index JSON."""
+    """Load and return all scenario names from the scenarios index JSON (read-only, cached per question)."""
     try:
-        with open(f'data/scenarios_{question}/_scenario_names.json', 'r') as f:
-            scenarios = json.load(f)
-        return scenarios
+        scenarios = load_json(f'data/scenarios_{question}/_scenario_names.json')
+        return MappingProxyType(scenarios)
     except Exception as e:
         print(f"Error loading scenario names: {e}")
         return {}
\ No newline at end of file